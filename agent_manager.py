@@ -1,18 +1,52 @@
+import logging
+import os
+import threading
 import time
-from langchain.agents import initialize_agent, Tool, AgentType
+import tracemalloc
+from contextvars import ContextVar
+from langchain.agents import initialize_agent, AgentExecutor, Tool, AgentType
 from langchain_community.chat_models import ChatOpenAI
-from langchain.prompts import PromptTemplate
-from langchain.memory import ConversationBufferMemory
 from streamlit import session_state
 
-from fetch_seo_data import fetch_seo_data
+from conversation_memory import PromptTokenLogger, create_memory
+from fetch_seo_data import COMPACT_SCHEMA, compact_tool_output, fetch_seo_data
+from http_client import get_session
+from intent_router import route, router_stats
+from llm_cache import get_llm_cache
 from manage_email import send_email
 from prompt import SYSTEM_PROMPT
+from session_workspace import compare_seo_data
+from streaming import StreamingAnswerHandler
+from tracing import LLMTraceHandler, span, tracer
 
-# Define available actions
+# Sampling temperature of the agent's model; at 0 its responses can be served from the LLM cache
+LLM_TEMPERATURE = float(os.getenv("SEO_LLM_TEMPERATURE", 0.8))
+# Measures the memory of each new session with tracemalloc; it slows every thread, so it is off by default
+PROFILE_SESSION_MEMORY = os.getenv("SEO_PROFILE_SESSION_MEMORY", "false").lower() == "true"
+
+# Prints the agent's reasoning steps to stdout; disable it when stdout carries machine-readable output
+AGENT_VERBOSE = os.getenv("SEO_AGENT_VERBOSE", "true").lower() != "false"
+
+# Session state of the turn being run; falls back to Streamlit's session state
+active_session_state = ContextVar("active_session_state", default=None)
+
+def current_session_state():
+    state = active_session_state.get()
+    return state if state is not None else session_state
+
+# Define available actions. The agent sees a compact view of SEO data;
+# the full record is kept in session state for the UI, file export and email.
 available_actions = {
-    "fetch_seo_data": lambda user_input: fetch_seo_data(user_input, session_state=session_state,save_to_file=True),
-    "send_email_summary": lambda user_input: send_email(user_input, session_state=session_state)
+    "fetch_seo_data": lambda user_input: compact_tool_output(fetch_seo_data(user_input, session_state=current_session_state(),store_result=True)),
+    "send_email_summary": lambda user_input: send_email(user_input, session_state=current_session_state()),
+    "compare_seo_data": lambda user_input: compare_seo_data(user_input, session_state=current_session_state()),
+}
+
+# Tool descriptions that differ from the generic one
+tool_descriptions = {
+    "fetch_seo_data": f"Action: fetch_seo_data. Returns compact JSON SEO data for a URL ({COMPACT_SCHEMA}).",
+    "compare_seo_data": "Action: compare_seo_data. Compares two or more domains named in the input side by side, "
+                        "reusing data already fetched in this conversation.",
 }
 
 
@@ -31,41 +65,155 @@ def get_tools():
                 Tool(
                     name=action_name,
                     func=action_func,
-                    description=f"Action: {action_name}. Executes the corresponding functionality."
+                    description=tool_descriptions.get(
+                        action_name, f"Action: {action_name}. Executes the corresponding functionality."
+                    )
                 )
             )
     return tools
 
-# Creates and initializes a LangChain agent
-def create_agent(api_key: str):
-    start_time = time.time()
-    llm = ChatOpenAI(temperature=0.8, openai_api_key=api_key,model="gpt-4o-mini")
-    print(f"LLM initialization took {time.time() - start_time} seconds.")
-       # Initialize memory with the system prompt as the first entry
-    memory = ConversationBufferMemory(
-        memory_key="chat_history",
-        return_messages=True
-    )
-    memory.chat_memory.add_user_message(SYSTEM_PROMPT)
-    memory.chat_memory.add_ai_message("ok")
+# The system prompt is prepared once per process. It is the agent's system
+# message; braces in its JSON example are escaped for the prompt template.
+system_message = SYSTEM_PROMPT.replace("{", "{{").replace("}", "}}")
+
+# Stateless parts shared by every session, keyed by API key and model
+_shared_agents = {}
+_shared_lock = threading.Lock()
+
+# Per-session startup measurements
+session_stats = {"sessions": 0, "startup_seconds": 0.0, "profiled_sessions": 0, "memory_bytes": 0}
+_stats_lock = threading.Lock()
+_profile_lock = threading.Lock()
+
+
+def get_shared_agent(api_key: str, llm=None):
+    """
+    Returns the process-wide agent (LLM client, parsed prompt and tools) for
+    `api_key`, building it on first use. It holds no conversation state.
+    `llm` replaces the default ChatOpenAI client, e.g. with a fake model in
+    benchmarks; each model gets its own agent.
+    """
+    # The cached agent references its model, so the id cannot be reused while it is cached
+    key = (api_key, id(llm) if llm is not None else None)
+    agent = _shared_agents.get(key)
+    if agent is not None:
+        return agent
+    with _shared_lock:
+        if key not in _shared_agents:
+            with span("agent_init"):
+                if llm is None:
+                    llm = ChatOpenAI(temperature=LLM_TEMPERATURE, openai_api_key=api_key,model="gpt-4o-mini", streaming=True,
+                                     cache=get_llm_cache())
+                get_session()  # Warm up the pooled HTTP client used by the tools
+                executor = initialize_agent(
+                    tools=get_tools(),  # List of tools for the agent
+                    llm=llm,  # Language model used by the agent
+                    agent=AgentType.CHAT_CONVERSATIONAL_REACT_DESCRIPTION,  # Type of agent
+                    agent_kwargs={"system_message": system_message},  # Additional agent arguments
+                )
+                _shared_agents[key] = executor.agent
+    return _shared_agents[key]
+
+
+# Creates a session's agent: shared LLM, prompt and tools plus its own memory
+def create_agent(api_key: str, llm=None):
+    agent = get_shared_agent(api_key, llm)
+
+    if not PROFILE_SESSION_MEMORY:
+        start_time = time.time()
+        executor = _build_session_executor(agent)
+        startup = time.time() - start_time
+        memory_used = None
+    else:
+        # Profiled sessions are created one at a time so tracemalloc windows do not overlap
+        with _profile_lock:
+            start_time = time.time()
+            tracing = tracemalloc.is_tracing()
+            if not tracing:
+                tracemalloc.start()
+            memory_before = tracemalloc.get_traced_memory()[0]
+            executor = _build_session_executor(agent)
+            memory_used = tracemalloc.get_traced_memory()[0] - memory_before
+            if not tracing:
+                tracemalloc.stop()
+            startup = time.time() - start_time
 
+    tracer.record("session_init", startup)
+    with _stats_lock:
+        session_stats["sessions"] += 1
+        session_stats["startup_seconds"] += startup
+        if memory_used is not None:
+            session_stats["profiled_sessions"] += 1
+            session_stats["memory_bytes"] += memory_used
+    logging.info(f"Session agent created in {startup:.4f} seconds"
+                 + (f" using {memory_used / 1024:.1f} KiB." if memory_used is not None else "."))
+    return executor
 
-    system_prompt = PromptTemplate(template=SYSTEM_PROMPT, input_variables=["chat_history"])
 
-    return initialize_agent(
+def _build_session_executor(agent):
+    # Per-session state: only the conversation memory, bounded by a token budget
+    llm = agent.llm_chain.llm
+    memory = create_memory(llm)
+
+    return AgentExecutor.from_agent_and_tools(
+        agent=agent,  # Shared agent (LLM, prompt and output parser)
         tools=get_tools(),  # List of tools for the agent
-        llm=llm,  # Language model used by the agent
-        agent=AgentType.CHAT_CONVERSATIONAL_REACT_DESCRIPTION,  # Type of agent
-        verbose=True,  # Enable detailed logs
-        agent_kwargs={"system_prompt": system_prompt},  # Additional agent arguments
+        verbose=AGENT_VERBOSE,  # Enable detailed logs
         memory=memory,  # Memory to track conversations
+        return_intermediate_steps=True,  # Tool results are kept in memory as compact references
+        callbacks=[PromptTokenLogger(llm)],  # Log prompt tokens per LLM call
         tags=["SEO_Agent"],  # Tags for traced runs
         handle_parsing_errors=True,  # Handle errors in parsing
     )
 
 
+# Returns the number of session agents created and their average startup cost
+def get_session_stats() -> dict:
+    with _stats_lock:
+        sessions = session_stats["sessions"]
+        profiled = session_stats["profiled_sessions"]
+        return {
+            "sessions": sessions,
+            "avg_startup_seconds": session_stats["startup_seconds"] / sessions if sessions else 0.0,
+            # Only measured with SEO_PROFILE_SESSION_MEMORY=true
+            "avg_memory_bytes": session_stats["memory_bytes"] / profiled if profiled else None,
+        }
+
+
 # Retrieves an agent instance or creates one if it doesn't exist using session state
 def get_agent_with_session(api_key, session_state):
     if session_state['agent'] is None:
         session_state['agent'] = create_agent(api_key)
     return session_state['agent']
+
+
+# Runs one chat turn: obvious commands are dispatched directly, anything else
+# goes through the agent with streamed progress. Used as a background job body.
+def run_turn(agent, user_input, session_state, job=None, llm_limiter=None):
+    token = active_session_state.set(session_state)
+    try:
+        return _run_turn(agent, user_input, session_state, job, llm_limiter)
+    finally:
+        active_session_state.reset(token)
+
+
+def _run_turn(agent, user_input, session_state, job, llm_limiter):
+    # Obvious commands are dispatched directly, without an LLM round trip
+    with span("route"):
+        routed = route(user_input, session_state)
+    if routed is not None:
+        # Keep the agent's memory in sync for follow-up questions
+        agent.memory.save_context({"input": user_input}, {"output": routed.output})
+        return routed.output
+
+    # Stream tool progress and answer tokens into the job as they arrive
+    stream_handler = StreamingAnswerHandler(
+        on_status=job.set_progress if job else None,
+        on_answer=job.set_partial if job else None,
+    )
+    callbacks = [stream_handler, LLMTraceHandler()] + ([llm_limiter] if llm_limiter else [])
+    with span("agent_turn"):
+        result = agent.invoke({"input": user_input}, config={"callbacks": callbacks})["output"]
+    timings = stream_handler.finish()
+    router_stats.record_llm(timings["total"])
+    return result
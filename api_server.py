@@ -0,0 +1,504 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import fcntl
+except ImportError:  # Windows: sessions are then only serialized within one worker
+    fcntl = None
+
+API_HOST = os.getenv("SEO_API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("SEO_API_PORT", 8000))
+API_WORKERS = int(os.getenv("SEO_API_WORKERS", 2))  # Worker processes
+API_MAX_CONCURRENT = int(os.getenv("SEO_API_MAX_CONCURRENT", 16))  # Requests in flight per worker, 429 above
+API_MAX_BATCH = int(os.getenv("SEO_API_MAX_BATCH", 100))  # Domains per /batch request
+API_MAX_BODY = int(os.getenv("SEO_API_MAX_BODY", 1024 * 1024))
+API_SESSION_TTL = float(os.getenv("SEO_API_SESSION_TTL", 3600))  # Seconds an idle chat session is kept
+API_SESSION_LOCK_FILE = os.getenv("SEO_API_SESSION_LOCK_FILE", "seo_api_sessions.lock")  # Shared by all workers
+API_TURN_WAIT = float(os.getenv("SEO_API_TURN_WAIT", 1))  # Seconds a turn waits for the session, 409 after
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ChatSession:
+    """
+    State of one API chat session inside a worker: the same session-state
+    keys the Streamlit UI uses, plus the session's agent.
+    """
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.state = {"chat_history": [], "last_seo_data": None, "last_seo_report": None,
+                      "workspace": None, "session_id": session_id}
+        self.agent = None
+        self.last_archive_id = 0  # Newest archived message this worker has seen
+        self.last_used = time.time()
+        self.lock = threading.Lock()
+
+
+class SessionLocks:
+    """
+    Serializes the turns of each chat session across worker processes.
+
+    Every session owns one byte of a shared lock file, locked with an
+    exclusive POSIX record lock, so any number of sessions needs a single
+    file. Record locks belong to the process and are all dropped when it
+    closes the file, so the file stays open for the worker's lifetime;
+    threads of one worker are already serialized by `ChatSession.lock`.
+    """
+
+    def __init__(self, path: str = API_SESSION_LOCK_FILE):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _offset(self, session_id: str) -> int:
+        return int(hashlib.sha1(session_id.encode()).hexdigest()[:15], 16)
+
+    def acquire(self, session_id: str, timeout: float) -> bool:
+        if fcntl is None or not self.path:
+            return True
+        deadline = time.time() + timeout
+        while True:
+            with self._lock:
+                if self._file is None:
+                    self._file = open(self.path, "a")
+                try:
+                    fcntl.lockf(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, self._offset(session_id))
+                    return True
+                except OSError:
+                    pass
+            if time.time() >= deadline:
+                return False
+            time.sleep(0.05)
+
+    def release(self, session_id: str):
+        if fcntl is None or not self.path:
+            return
+        with self._lock:
+            fcntl.lockf(self._file, fcntl.LOCK_UN, 1, self._offset(session_id))
+
+
+class SEOService:
+    """
+    The endpoints' logic, on top of the same modules as the Streamlit app.
+
+    Chat sessions live in the worker that served them. Every turn is also
+    written to the result store's chat archive, and the domains analyzed in
+    a session to its saved workspace, so a worker receiving a session it has
+    not seen (or whose newer turns were served elsewhere) rebuilds the
+    session's memory and workspace from the store first. Email delivery
+    statuses are published to the store as well, so any worker can report them.
+    """
+
+    def __init__(self):
+        # Core modules are imported after the fork so each worker opens its
+        # own SQLite connections and starts its own background threads
+        import agent_manager
+        import bulk_analysis
+        import chat_view
+        import fetch_seo_data
+        import job_manager
+        import llm_cache
+        import manage_email
+        import result_store
+        import session_workspace
+        import tracing
+
+        self.agent_manager = agent_manager
+        self.bulk_analysis = bulk_analysis
+        self.chat_view = chat_view
+        self.fetch_seo_data = fetch_seo_data
+        self.job_manager = job_manager.job_manager
+        self.llm_cache = llm_cache
+        self.manage_email = manage_email
+        self.result_store = result_store
+        self.session_workspace = session_workspace
+        self.tracing = tracing
+        self.sessions = {}
+        self.session_locks = SessionLocks()
+        self._lock = threading.Lock()
+        store = result_store.get_result_store()
+        manage_email.mail_queue.add_listener(lambda ticket: store.save_ticket(ticket.as_dict()))
+
+    # Sessions
+
+    def _session(self, session_id):
+        now = time.time()
+        with self._lock:
+            expired = [key for key, session in self.sessions.items() if now - session.last_used > API_SESSION_TTL]
+            for key in expired:
+                del self.sessions[key]
+            if not session_id:
+                session_id = uuid.uuid4().hex
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = self.sessions[session_id] = ChatSession(session_id)
+            session.last_used = now
+        return session
+
+    def _load_workspace(self, session):
+        """
+        Brings the session's workspace up to date with the domains analyzed
+        for it on other workers, from their stored snapshots when available.
+        """
+        store = self.result_store.get_result_store()
+        entries = store.workspace_entries(session.id)
+        workspace = self.session_workspace.get_workspace(session.state)
+        if not entries or entries == workspace.entries():
+            return
+        for domain, turn in entries:
+            seo_data = workspace.get(domain)
+            if seo_data is None:
+                snapshot = store.latest(domain)
+                seo_data = snapshot["data"] if snapshot else self.session_workspace.get_or_fetch(domain, session.state)
+            if seo_data and "error" not in seo_data:
+                workspace.add(seo_data, turn=turn, report=workspace.reports.get(domain))
+        session.state["last_seo_data"] = workspace.latest()
+
+    def _save_workspace(self, session):
+        store = self.result_store.get_result_store()
+        store.save_workspace(session.id, self.session_workspace.get_workspace(session.state).entries())
+        store.flush()  # The next request of the session may be served by another worker
+
+    def _sync_session(self, session, api_key):
+        """
+        Creates the session's agent if needed and replays archived turns this worker has not seen.
+        """
+        if session.agent is None:
+            session.agent = self.agent_manager.create_agent(api_key)
+        self._load_workspace(session)
+        store = self.result_store.get_result_store()
+        newest = store.archived_messages(session.id, limit=1)
+        if not newest or newest[0]["id"] <= session.last_archive_id:
+            return
+        missed = []
+        before_id = None
+        while True:
+            page = store.archived_messages(session.id, limit=200, before_id=before_id)
+            page = [msg for msg in page if msg["id"] > session.last_archive_id]
+            missed.extend(page)
+            if len(page) < 200:
+                break
+            before_id = page[-1]["id"]
+        missed.reverse()
+        for user_msg, agent_msg in zip(missed[::2], missed[1::2]):
+            session.agent.memory.save_context({"input": user_msg["content"]}, {"output": agent_msg["content"]})
+        session.state["chat_history"].extend({"role": msg["role"], "content": msg["content"]} for msg in missed)
+        session.last_archive_id = newest[0]["id"]
+
+    # Endpoints
+
+    def analyze(self, body: dict) -> dict:
+        domain = body.get("domain")
+        if not domain:
+            raise ApiError(400, "Missing 'domain'.")
+        session = self._session(body["session_id"]) if body.get("session_id") else None
+        state = session.state if session else {}
+        if session:
+            self._load_workspace(session)
+        seo_data = self.fetch_seo_data.fetch_seo_data(domain, session_state=state, store_result=True)
+        if session:
+            self._save_workspace(session)
+        if seo_data is None:
+            raise ApiError(400, f"No domain found in {domain!r}.")
+        if "error" in seo_data:
+            raise ApiError(502, seo_data["error"])
+        return seo_data
+
+    def batch(self, body: dict) -> dict:
+        domains = body.get("domains")
+        if not isinstance(domains, list) or not domains:
+            raise ApiError(400, "'domains' must be a non-empty list.")
+        if len(domains) > API_MAX_BATCH:
+            raise ApiError(413, f"At most {API_MAX_BATCH} domains per batch.")
+        try:
+            workers = int(body.get("workers", self.bulk_analysis.DEFAULT_WORKERS))
+        except (TypeError, ValueError):
+            raise ApiError(400, "'workers' must be an integer.")
+        workers = max(1, min(workers, self.bulk_analysis.DEFAULT_WORKERS))
+        start_time = time.time()
+        results = []
+        for result in self.bulk_analysis.analyze_domains(domains, max_workers=workers):
+            record = result.pop("record")
+            results.append({**(record.to_dict() if record is not None else {"domain": self.fetch_seo_data.normalize_domain(result["input"])}), **result})
+        return {"results": results, "elapsed": round(time.time() - start_time, 3)}
+
+    def chat(self, body: dict) -> dict:
+        message = (body.get("message") or "").strip()
+        if not message:
+            raise ApiError(400, "Missing 'message'.")
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ApiError(503, "OPENAI_API_KEY is not set.")
+        session = self._session(body.get("session_id"))
+        # One turn at a time per session, like the UI, whichever worker serves it
+        deadline = time.time() + API_TURN_WAIT
+        if not session.lock.acquire(timeout=API_TURN_WAIT):
+            raise ApiError(409, "A turn is already running for this session.")
+        if not self.session_locks.acquire(session.id, max(deadline - time.time(), 0)):
+            session.lock.release()
+            raise ApiError(409, "A turn is already running for this session.")
+        try:
+            self._sync_session(session, api_key)
+            session.state["chat_history"].append({"role": "user", "content": message})
+            answer = self.agent_manager.run_turn(session.agent, message, session.state,
+                                                 llm_limiter=self.job_manager.llm_limiter())
+            reply = {"role": "AI agent", "content": answer}
+            session.state["chat_history"].append(reply)
+            store = self.result_store.get_result_store()
+            store.archive_messages(session.id, session.state["chat_history"][-2:])
+            self._save_workspace(session)  # Also flushes: the next turn may be served by another worker
+            newest = store.archived_messages(session.id, limit=1)
+            session.last_archive_id = newest[0]["id"] if newest else session.last_archive_id
+            self.chat_view.trim_history(session.state)  # Already archived, only bound the memory held
+        finally:
+            self.session_locks.release(session.id)
+            session.lock.release()
+        return {"session_id": session.id, "answer": answer}
+
+    def email(self, body: dict) -> dict:
+        recipient = body.get("recipient")
+        if not recipient or not self.manage_email.get_first_email(recipient):
+            raise ApiError(400, "Missing or invalid 'recipient'.")
+        session = self._session(body["session_id"]) if body.get("session_id") else None
+        state = session.state if session else {}
+        if session:
+            self._load_workspace(session)
+        domain = body.get("domain")
+        if domain:
+            seo_data = self.session_workspace.get_or_fetch(domain, state)
+            if session:
+                self._save_workspace(session)
+        else:
+            seo_data = self.session_workspace.get_workspace(state).latest()
+        if not seo_data:
+            raise ApiError(400, "Give a 'domain', or a 'session_id' that has analyzed one.")
+        if "error" in seo_data:
+            raise ApiError(502, seo_data["error"])
+        subject, text = self.manage_email.generate_email_content(seo_data)
+        try:
+            ticket = self.manage_email.queue_email(subject, text, recipient)
+        except ValueError as e:
+            raise ApiError(503, str(e))
+        self.result_store.get_result_store().flush()  # The ticket may be polled on another worker
+        return ticket.as_dict()
+
+    def email_status(self, ticket_id: str) -> dict:
+        # Tickets queued by this worker are current; others come from the store
+        status = self.manage_email.get_delivery_status(ticket_id)
+        if status is None:
+            status = self.result_store.get_result_store().ticket(ticket_id)
+        if status is None:
+            raise ApiError(404, f"Unknown ticket {ticket_id}.")
+        return status
+
+
+class ApiServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server with a bounded number of requests in flight; requests
+    over the limit are rejected with 429 instead of queueing.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, listener: socket.socket, max_concurrent: int = API_MAX_CONCURRENT):
+        super().__init__(listener.getsockname()[:2], ApiRequestHandler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = listener  # Shared with the other worker processes
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+        self.rejected = 0
+        self.counter_lock = threading.Lock()
+        self.service = SEOService()
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    def _send_json(self, status: int, payload, headers=None):
+        body = json.dumps(payload, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > API_MAX_BODY:
+            raise ApiError(413, "Request body too large.")
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise ApiError(400, "Request body must be JSON.")
+        if not isinstance(body, dict):
+            raise ApiError(400, "Request body must be a JSON object.")
+        return body
+
+    def _dispatch(self, handler, *args):
+        server = self.server
+        if not server.slots.acquire(blocking=False):
+            with server.counter_lock:
+                server.rejected += 1
+            self._send_json(429, {"error": "Server busy, retry later."}, {"Retry-After": "1"})
+            return
+        with server.counter_lock:
+            server.in_flight += 1
+        try:
+            self._send_json(200, handler(*args))
+        except ApiError as e:
+            self._send_json(e.status, {"error": str(e)})
+        except Exception as e:
+            logging.exception(f"API error on {self.path}")
+            self._send_json(500, {"error": f"An unexpected error occurred: {e}"})
+        finally:
+            with server.counter_lock:
+                server.in_flight -= 1
+            server.slots.release()
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        tracing = self.server.service.tracing
+        if path == "/health":
+            self._send_json(200, {"status": "ok", "worker": os.getpid(), "in_flight": self.server.in_flight,
+                                  "max_concurrent": self.server.max_concurrent, "rejected": self.server.rejected,
+                                  "sessions": len(self.server.service.sessions),
+                                  "llm_cache": self.server.service.llm_cache.get_llm_cache_stats()})
+        elif path == "/metrics":
+            body = tracing.tracer.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif path == "/metrics.json":
+            self._send_json(200, tracing.tracer.summary())
+        elif path.startswith("/email/"):
+            self._dispatch(self.server.service.email_status, path[len("/email/"):])
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint {path}."})
+
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        service = self.server.service
+        handlers = {"/analyze": service.analyze, "/batch": service.batch, "/chat": service.chat, "/email": service.email}
+        if path not in handlers:
+            self._send_json(404, {"error": f"Unknown endpoint {path}."})
+            return
+        try:
+            body = self._read_json()
+        except ApiError as e:
+            self._send_json(e.status, {"error": str(e)})
+            return
+        self._dispatch(handlers[path], body)
+
+    def log_message(self, format, *args):
+        logging.info(f"{self.address_string()} {format % args}")
+
+
+def serve_worker(listener: socket.socket, max_concurrent: int):
+    server = ApiServer(listener, max_concurrent)
+    logging.info(f"API worker {os.getpid()} serving on {listener.getsockname()[:2]}")
+    server.serve_forever()
+
+
+def share_rate_limit(workers: int):
+    """
+    The RapidAPI token bucket is per process: splits its rate and burst
+    between the workers, keeping a burst of at least one request each.
+    """
+    rate = float(os.getenv("RAPIDAPI_RATE_PER_SECOND", 5))
+    burst = float(os.getenv("RAPIDAPI_BURST", 5))
+    os.environ["RAPIDAPI_RATE_PER_SECOND"] = str(rate / workers)
+    os.environ["RAPIDAPI_BURST"] = str(max(burst / workers, 1.0))
+
+
+def run(host: str = API_HOST, port: int = API_PORT, workers: int = API_WORKERS,
+        max_concurrent: int = API_MAX_CONCURRENT):
+    """
+    Binds once, then forks `workers` processes that accept on the same socket.
+    Falls back to a single process where fork is unavailable. Dead workers
+    are restarted; SIGINT/SIGTERM stop them all.
+    """
+    listener = socket.create_server((host, port), backlog=128)
+    if workers > 1 and hasattr(os, "fork"):
+        share_rate_limit(workers)
+    else:
+        workers = 1
+    print(f"SEO API listening on http://{host}:{port} with {workers} worker(s)")
+    if workers == 1:
+        serve_worker(listener, max_concurrent)
+        return
+
+    children = set()
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                serve_worker(listener, max_concurrent)
+            finally:
+                os._exit(0)
+        children.add(pid)
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if not stopping:
+            logging.warning(f"API worker {pid} exited with status {status}, restarting")
+            spawn()
+    listener.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless HTTP API for SEO analysis, chat and email.")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("-w", "--workers", type=int, default=API_WORKERS, help="Worker processes")
+    parser.add_argument("-c", "--max-concurrent", type=int, default=API_MAX_CONCURRENT,
+                        help="Requests in flight per worker before answering 429")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(process)d %(levelname)s %(message)s")
+    run(args.host, args.port, max(1, args.workers), max(1, args.max_concurrent))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
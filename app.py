@@ -1,11 +1,22 @@
 import logging
+import threading
 import time
 import streamlit as st
 import os
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from session_utils import get_session_state
-from agent_manager import create_agent, get_agent_with_session
+from agent_manager import get_agent_with_session, run_turn
+from chat_view import CHAT_PAGE_SIZE, render_history, trim_history
+from job_manager import job_manager
+from result_store import get_result_store
+from session_workspace import get_workspace
+from tracing import start_metrics_server
 
 
+# Expose latency metrics for Prometheus when a port is configured
+if os.getenv("SEO_METRICS_PORT"):
+    start_metrics_server(int(os.getenv("SEO_METRICS_PORT")))
+
 # Sidebar for API Key
 st.sidebar.header("Configuration .env file")
 #openai_api_key = st.sidebar.text_input("OpenAI API Key", type="password")
@@ -38,9 +49,7 @@ if openai_api_key and not session_state['agent']:
     print("Initializing agent...")
     session_state['agent'] = get_agent_with_session(openai_api_key,session_state)
 
-if "agent" not in st.session_state or st.session_state["agent"] is None:
-    st.session_state["agent"] = create_agent(os.getenv("OPENAI_API_KEY"))   
-agent = st.session_state["agent"]
+agent = session_state['agent']
 # Main UI
 st.title("SEO Assistant")
 
@@ -68,14 +77,40 @@ if st.button("Submit"):
         st.warning("Input is empty. Please enter a valid query.")
     elif not agent:
         st.error("Agent not initialized. Please provide an OpenAI API key.")
+    elif session_state.get('active_job'):
+        st.warning("Still working on your previous request, please wait.")
     else:
         session_state['chat_history'].append({"role": "user", "content": user_input})
 
-        try:
-            start_time = time.time()
-            result = agent.run({"input": user_input})  # Run the agent with user input
-            print(f"LLM took {time.time() - start_time} seconds to respond")
-            
+        # Run the turn in the process-wide worker pool; the page polls for it below
+        script_ctx = get_script_run_ctx()
+
+        def run_job(job, agent=agent, user_input=user_input):
+            # Tools read this session's state, so the worker runs in its script context
+            add_script_run_ctx(threading.current_thread(), script_ctx)
+            return run_turn(agent, user_input, session_state, job=job, llm_limiter=job_manager.llm_limiter(job))
+
+        job = job_manager.submit(run_job, key=(id(agent), user_input))
+        session_state['active_job'] = job.id
+
+# Poll the active job instead of blocking the script run
+if session_state.get('active_job'):
+    job = job_manager.get(session_state['active_job'])
+    if job is None:
+        session_state['active_job'] = None
+    elif not job.finished:
+        st.info(job.progress or "Working on it…")
+        if job.partial:
+            st.markdown(job.partial)
+        if st.button("Cancel"):
+            job_manager.cancel(job.id)
+        time.sleep(0.5)
+        st.rerun()
+    else:
+        session_state['active_job'] = None
+        if job.status == "done":
+            result = job.result
+
             # Ensure result is structured for tools like send_email_summary
             if isinstance(result, dict) and "action" in result and "action_input" in result:
                 action_input = result["action_input"]
@@ -91,37 +126,44 @@ if st.button("Submit"):
             print(result)  # Debug the structured result
             session_state['chat_history'].append({"role": "AI agent", "content": result})
             st.write(result)
-        except Exception as e:
-            logging.error(f"An error occurred in app: {e}")
+        elif job.status == "cancelled":
+            st.warning("Request cancelled.")
+        else:
+            logging.error(f"An error occurred in app: {job.error}")
+            st.error(f"An error occurred: {job.error}")
 
 
 
-# Show download button only if SEO data exists
-if "last_seo_data" in st.session_state and st.session_state["last_seo_data"] is not None:
-    with open("seo_data.txt", "rb") as file:
-        st.download_button("Download SEO Data", file, file_name="seo_data.txt", mime="text/plain")
+# Show download button only if SEO data exists; reports are served from the session workspace
+workspace = get_workspace(session_state)
+if len(workspace):
+    domains = workspace.domains()
+    domain = st.selectbox("Analyzed websites", domains) if len(domains) > 1 else domains[0]
+    st.download_button("Download SEO Data", workspace.report(domain), file_name=f"seo_data_{domain}.txt", mime="text/plain")
 
 # Clear Conversation
 if st.button("Clear Conversation"):
     st.session_state['chat_history'] = []
     st.session_state['last_input'] = ''
     st.session_state['last_seo_data'] = None  # Reset last_seo_data
+    st.session_state['last_seo_report'] = None
+    workspace.clear()
+    st.session_state['chat_visible'] = CHAT_PAGE_SIZE
     st.rerun()  # Rerun to refresh the UI
 
 # Display Chat History
 st.subheader("Conversation History")
-conversation_html = """
-<div style="max-height: 400px; overflow-y: auto; border: 1px solid #ccc; padding: 10px; border-radius: 5px;">
-"""
-
-# Add messages to the container
-for i, msg in enumerate(reversed(session_state['chat_history'])):
-    if msg["role"] == "user":
-        conversation_html += f"<p><strong style='color: #007bff;'>You:</strong> {msg['content']}</p>"
-    else:
-        conversation_html += f"<p><strong style='color: #28a745;'>AI Agent:</strong> {msg['content']}</p>"
-    if i < len(session_state['chat_history']) - 1:
-        conversation_html += "<hr style='border: none; border-top: 1px solid #ccc; margin: 10px 0;'>"
 
-conversation_html += "</div>"
-st.markdown(conversation_html, unsafe_allow_html=True)
\ No newline at end of file
+# Bound the history kept in memory; older turns go to the result store
+trim_history(
+    session_state,
+    archive=lambda messages: get_result_store().archive_messages(session_state['session_id'], messages),
+)
+
+# Only the newest page is rendered; each message's HTML is built once and cached
+chat_history = session_state['chat_history']
+st.markdown(render_history(chat_history, session_state['chat_visible']), unsafe_allow_html=True)
+if session_state['chat_visible'] < len(chat_history):
+    if st.button("Load older messages"):
+        session_state['chat_visible'] += CHAT_PAGE_SIZE
+        st.rerun()
@@ -0,0 +1,488 @@
+# Offline load test for the SEO agent.
+#
+# Starts local stand-ins for the SimilarWeb API (HTTP), Gmail (SMTP) and the
+# OpenAI chat model, then drives fetch_seo_data, send_email and the full
+# create_agent loop with concurrent simulated sessions. Reports throughput,
+# latency percentiles and memory per session as JSON:
+#
+#     python benchmark.py --sessions 50 --turns 5 --api-latency 0.2
+import argparse
+import contextlib
+import gc
+import json
+import logging
+import os
+import random
+import re
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+COUNTRIES = ["United States", "France", "Germany", "India", "Brazil", "Japan"]
+
+
+def fake_site_payload(domain: str, similar_count: int = 10) -> dict:
+    """
+    Builds a deterministic response shaped like SimilarWeb's similar-sites endpoint.
+    """
+    rng = random.Random(domain)
+    return {
+        "Domain": domain,
+        "Title": f"{domain} - Home",
+        "Description": f"Official website of {domain}. " * 4,
+        "Category": rng.choice(["News_and_Media", "Shopping", "Pets_and_Animals", "Computers"]),
+        "Visits": rng.randint(10_000, 50_000_000),
+        "Tags": [f"tag{rng.randint(1, 50)}" for _ in range(5)],
+        "SimilarSites": [
+            {
+                "Domain": f"similar{index}-{domain}",
+                "Title": f"Similar site {index}",
+                "Description": "A competitor with comparable audience. " * 3,
+                "Visits": rng.randint(1_000, 5_000_000),
+                "TopCountry": {"CountryName": rng.choice(COUNTRIES)},
+            }
+            for index in range(similar_count)
+        ],
+        "Images": {
+            "Favicon": f"https://{domain}/favicon.ico",
+            "Desktop": f"https://img.example/{domain}/desktop.png",
+            "Smartphone": f"https://img.example/{domain}/mobile.png",
+        },
+    }
+
+
+class FakeSimilarWebServer(ThreadingHTTPServer):
+    """
+    Local HTTP stand-in for the SimilarWeb API with configurable latency and error rate.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.1, error_rate: float = 0.0, similar_count: int = 10):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.similar_count = similar_count
+        self.requests = 0
+        self._lock = threading.Lock()
+        super().__init__(("127.0.0.1", 0), _SimilarWebHandler)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/similar-sites"
+
+
+class _SimilarWebHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+
+    def do_GET(self):
+        server = self.server
+        with server._lock:
+            server.requests += 1
+        time.sleep(server.latency)
+        parsed = urlparse(self.path)
+        domain = parse_qs(parsed.query).get("domain", [""])[0]
+        if parsed.path != "/similar-sites" or not domain:
+            self._reply(404, {"message": "Not found"})
+        elif random.random() < server.error_rate:
+            self._reply(random.choice([429, 500, 503]), {"message": "Simulated failure"})
+        else:
+            self._reply(200, fake_site_payload(domain, server.similar_count))
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("x-ratelimit-requests-limit", "1000000")
+        self.send_header("x-ratelimit-requests-remaining", "999999")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SmtpSink(socketserver.ThreadingTCPServer):
+    """
+    Minimal local SMTP server that accepts any login and discards messages.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.messages = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        super().__init__(("127.0.0.1", 0), _SmtpHandler)
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+        self.wfile.flush()
+
+    def handle(self):
+        sink = self.server
+        with sink._lock:
+            sink.connections += 1
+        self.reply("220 smtp-sink ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith("EHLO"):
+                self.reply("250-smtp-sink")
+                self.reply("250 AUTH PLAIN")
+            elif command.startswith("HELO"):
+                self.reply("250 smtp-sink")
+            elif command.startswith("AUTH"):
+                self.reply("235 Authentication successful")
+            elif command.startswith("DATA"):
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline().rstrip(b"\r\n") != b".":
+                    pass
+                time.sleep(sink.latency)
+                with sink._lock:
+                    sink.messages += 1
+                self.reply("250 Queued")
+            elif command.startswith("QUIT"):
+                self.reply("221 Bye")
+                return
+            else:  # MAIL, RCPT, RSET, NOOP
+                self.reply("250 OK")
+
+
+def percentiles(samples) -> dict:
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))], 4) if ordered else 0.0
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": pick(1.0)}
+
+
+def run_concurrently(sessions: int, turns: int, work):
+    """
+    Runs `work(session_index, turn_index)` for every turn of every simulated
+    session, sessions in parallel and turns in sequence. Returns a report.
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def session(index):
+        for turn in range(turns):
+            start_time = time.perf_counter()
+            try:
+                work(index, turn)
+                failed = None
+            except Exception as e:
+                failed = repr(e)
+            elapsed = time.perf_counter() - start_time
+            with lock:
+                latencies.append(elapsed)
+                if failed:
+                    errors.append(failed)
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        list(executor.map(session, range(sessions)))
+    elapsed = time.perf_counter() - start_time
+    return {
+        "operations": len(latencies),
+        "errors": len(errors),
+        "sample_errors": errors[:3],
+        "elapsed": round(elapsed, 3),
+        "throughput_per_second": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency": percentiles(latencies),
+    }
+
+
+def make_scripted_chat_model(latency: float = 0.0):
+    """
+    Returns a deterministic chat model that mimics the conversational ReAct
+    agent: it calls fetch_seo_data for the domain in the user's message, then
+    answers from the tool response.
+    """
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    domain_pattern = re.compile(r"https?://[a-zA-Z0-9./-]+|[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+
+    def action(name, action_input):
+        return "```json\n" + json.dumps({"action": name, "action_input": action_input}) + "\n```"
+
+    class ScriptedChatModel(BaseChatModel):
+        delay: float = latency
+
+        @property
+        def _llm_type(self) -> str:
+            return "scripted-benchmark"
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            time.sleep(self.delay)
+            last = str(messages[-1].content)
+            if last.startswith("TOOL RESPONSE"):
+                content = action("Final Answer", "Here is the SEO analysis you asked for.")
+            else:
+                match = domain_pattern.search(last)
+                content = (action("fetch_seo_data", match.group(0)) if match
+                           else action("Final Answer", "Summary of the conversation so far."))
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+        def get_num_tokens(self, text: str) -> int:
+            return len(text.split())
+
+        def get_num_tokens_from_messages(self, messages, tools=None) -> int:
+            return sum(len(str(message.content).split()) for message in messages)
+
+    return ScriptedChatModel()
+
+
+def configure_environment(api_url: str, smtp_port: int, use_cache: bool):
+    """
+    Points the application at the local stand-ins. Must run before the
+    application modules are imported, since they read their configuration at import.
+    Every store is kept in a scratch directory so runs never touch the real databases.
+    """
+    scratch = tempfile.mkdtemp(prefix="seo-benchmark-")
+    os.environ.update({
+        "SIMILARWEB_API_URL": api_url,
+        "RAPIDAPI_KEY": "benchmark",
+        "RAPIDAPI_RATE_PER_SECOND": "100000",
+        "RAPIDAPI_BURST": "100000",
+        "RAPIDAPI_QUOTA_FILE": "",
+        "SEO_CACHE_DB": os.path.join(scratch, "seo_cache.db"),
+        "SEO_RESULT_DB": os.path.join(scratch, "seo_results.db"),
+        "SEO_LLM_CACHE_DB": os.path.join(scratch, "llm_cache.db"),
+        "SEO_WATCHLIST_FILE": os.path.join(scratch, "watchlist.json"),
+        "SEO_AGENT_VERBOSE": "false",
+        "SMTP_HOST": "127.0.0.1",
+        "SMTP_PORT": str(smtp_port),
+        "SMTP_STARTTLS": "false",
+        "SENDER_EMAIL": "benchmark@example.com",
+        "SENDER_PASSWORD": "benchmark",
+        "SEO_HTTP_MAX_RETRIES": os.getenv("SEO_HTTP_MAX_RETRIES", "1"),
+    })
+    if not use_cache:
+        os.environ.update({"SEO_CACHE_TTL": "0", "SEO_CACHE_STALE_TTL": "0", "SEO_CACHE_DB": ""})
+
+
+def bench_fetch(sessions: int, turns: int) -> dict:
+    from fetch_seo_data import fetch_seo_data
+
+    def work(index, turn):
+        state = {}
+        result = fetch_seo_data(f"analyze https://site{index}-{turn}.example", session_state=state)
+        if not result or "error" in result:
+            raise RuntimeError(result.get("error") if result else "no result")
+
+    return run_concurrently(sessions, turns, work)
+
+
+def bench_email(sessions: int, turns: int, sink: SmtpSink) -> dict:
+    from email_queue import mail_queue
+    from fetch_seo_data import fetch_seo_data
+    from manage_email import send_email
+
+    tickets = []
+    lock = threading.Lock()
+
+    def work(index, turn):
+        domain = f"https://mail{index}-{turn}.example"
+        state = {
+            "chat_history": [{"role": "user", "content": f"analyze {domain}"}],
+            "last_seo_data": None,
+        }
+        # The report is emailed after the domain has been analyzed in the session
+        fetch_seo_data(domain, session_state=state)
+        result = send_email(f"email the report to user{index}@example.com", session_state=state)
+        match = re.search(r"ticket (\w+)", result)
+        if not match:
+            raise RuntimeError(result)
+        with lock:
+            tickets.append(mail_queue.get_ticket(match.group(1)))
+
+    report = run_concurrently(sessions, turns, work)
+    start_time = time.perf_counter()
+    for ticket in tickets:
+        ticket.wait(60)
+    report["delivery_drain_seconds"] = round(time.perf_counter() - start_time, 3)
+    report["delivered"] = sum(1 for ticket in tickets if ticket.status == "sent")
+    report["smtp_messages"] = sink.messages
+    report["smtp_connections"] = sink.connections
+    return report
+
+
+def bench_digest(sessions: int, turns: int, sink: SmtpSink) -> dict:
+    """
+    Groups `turns` reports for each of `sessions` recipients into digests and
+    sends them in one flush, over a single SMTP connection.
+    """
+    from email_digest import DigestBatcher
+    from fetch_seo_data import analyze_domain
+
+    batcher = DigestBatcher(interval=0)
+    messages_before, connections_before = sink.messages, sink.connections
+    start_time = time.perf_counter()
+    for index in range(sessions):
+        for turn in range(turns):
+            batcher.add(f"user{index}@example.com", analyze_domain(f"digest{index}-{turn}.example"))
+    collect_seconds = time.perf_counter() - start_time
+    report = batcher.flush()
+    report["collect_seconds"] = round(collect_seconds, 3)
+    report["smtp_messages"] = sink.messages - messages_before
+    report["smtp_connections"] = sink.connections - connections_before
+    return report
+
+
+def bench_agent(sessions: int, turns: int, llm_latency: float) -> dict:
+    from agent_manager import create_agent, run_turn
+
+    llm = make_scripted_chat_model(llm_latency)
+    agents = {}
+    states = {}
+
+    tracemalloc.start()
+    memory_before = tracemalloc.get_traced_memory()[0]
+
+    def work(index, turn):
+        if index not in agents:
+            agents[index] = create_agent("benchmark", llm=llm)
+            states[index] = {"chat_history": [], "last_seo_data": None}
+        # Phrased as a question so the intent router hands it to the agent
+        question = f"what does the SEO of https://agent{index}-{turn}.example look like?"
+        states[index]["chat_history"].append({"role": "user", "content": question})
+        run_turn(agents[index], question, states[index])
+
+    report = run_concurrently(sessions, turns, work)
+    # Sessions are still alive here, so this is what they hold
+    memory_used = tracemalloc.get_traced_memory()[0] - memory_before
+    tracemalloc.stop()
+    report["memory_per_session_bytes"] = int(memory_used / max(len(agents), 1))
+    return report
+
+
+def bench_models(count: int) -> dict:
+    """
+    Micro-benchmark of the dict parsing path against slotted SiteRecords:
+    parse + serialize time and memory held per record.
+
+    Each record is built from a freshly decoded response body inside the
+    traced window, so the memory figures include any part of the raw
+    payload a record keeps alive. Both paths serialize with seo_models.dumps.
+    """
+    from fetch_seo_data import parse_main_site_info, parse_similar_sites
+    from seo_models import SiteRecord, dumps
+
+    bodies = [json.dumps(fake_site_payload(f"model{index}.example", similar_count=20)) for index in range(count)]
+
+    def measure(build, serialize):
+        # Timed without tracemalloc, which slows every allocation
+        start_time = time.perf_counter()
+        objects = [build(json.loads(body)) for body in bodies]
+        parse_seconds = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        for obj in objects:
+            serialize(obj)
+        serialize_seconds = time.perf_counter() - start_time
+        del objects
+        gc.collect()
+        tracemalloc.start()
+        objects = [build(json.loads(body)) for body in bodies]
+        gc.collect()
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return {
+            "parse_us_per_record": round(parse_seconds / count * 1e6, 2),
+            "serialize_us_per_record": round(serialize_seconds / count * 1e6, 2),
+            "bytes_per_record": int(memory / len(objects)),
+        }
+
+    def build_dict(payload):
+        return {**parse_main_site_info(payload), "similar_sites": parse_similar_sites(payload), "response_time": 0.0}
+
+    return {
+        "records": count,
+        "dict": measure(build_dict, dumps),
+        "slotted": measure(lambda payload: SiteRecord.from_api(payload, 0.0), lambda record: record.to_json()),
+    }
+
+
+SCENARIOS = ("fetch", "email", "digest", "agent", "models")
+
+
+def run_scenarios(scenarios, args, sink: SmtpSink, report: dict):
+    for name in scenarios:
+        if name == "fetch":
+            report["results"]["fetch"] = bench_fetch(args.sessions, args.turns)
+        elif name == "email":
+            report["results"]["email"] = bench_email(args.sessions, args.turns, sink)
+        elif name == "digest":
+            report["results"]["digest"] = bench_digest(args.sessions, args.turns, sink)
+        elif name == "agent":
+            report["results"]["agent"] = bench_agent(args.sessions, args.turns, args.llm_latency)
+        elif name == "models":
+            report["results"]["models"] = bench_models(args.model_records)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load test with local RapidAPI, SMTP and LLM stand-ins.")
+    parser.add_argument("--sessions", type=int, default=20, help="Concurrent simulated sessions")
+    parser.add_argument("--turns", type=int, default=5, help="Turns per session")
+    parser.add_argument("--api-latency", type=float, default=0.1, help="Fake SimilarWeb latency in seconds")
+    parser.add_argument("--api-error-rate", type=float, default=0.0, help="Share of fake API calls that fail")
+    parser.add_argument("--smtp-latency", type=float, default=0.0, help="Fake SMTP latency per message")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Fake LLM latency per call")
+    parser.add_argument("--use-cache", action="store_true", help="Keep the SimilarWeb cache enabled")
+    parser.add_argument("--scenarios", default="fetch,email,agent", help="Comma-separated scenarios to run (fetch, email, digest, agent, models)")
+    parser.add_argument("--model-records", type=int, default=5000, help="Records parsed by the models scenario")
+    parser.add_argument("-o", "--output", help="Also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    api = FakeSimilarWebServer(latency=args.api_latency, error_rate=args.api_error_rate)
+    sink = SmtpSink(latency=args.smtp_latency)
+    for server in (api, sink):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    configure_environment(api.url, sink.port, args.use_cache)
+
+    # stdout carries only the JSON report: logs and anything the application prints go to stderr
+    logging.basicConfig(stream=sys.stderr, level=logging.WARNING)
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario: {', '.join(unknown)}")
+    report = {"config": vars(args), "results": {}}
+    with contextlib.redirect_stdout(sys.stderr):
+        run_scenarios(scenarios, args, sink, report)
+    report["upstream_requests"] = api.requests
+
+    from tracing import tracer
+    report["stages"] = tracer.summary()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    api.shutdown()
+    sink.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+import argparse
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from fetch_seo_data import analyze_domain_record, normalize_domain
+from rate_limiter import BATCH
+from seo_models import dumps
+
+DEFAULT_WORKERS = 8
+
+
+def read_domains(path: str) -> list:
+    """
+    Reads domains from a file (one per line, blank lines and # comments ignored).
+    Use "-" to read from standard input.
+    """
+    handle = sys.stdin if path == "-" else open(path, "r")
+    try:
+        return [line.strip() for line in handle if line.strip() and not line.strip().startswith("#")]
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def analyze_one(domain: str) -> dict:
+    """
+    Analyzes one domain or URL and always returns a result; "input" is the
+    value as given, failures are reported in its "error" field instead of
+    being raised. On success "record" holds the SiteRecord.
+    """
+    start_time = time.time()
+    result = {"input": domain, "error": None, "record": None}
+    try:
+        record = analyze_domain_record(normalize_domain(domain), priority=BATCH)
+        result["record"] = record
+        if hasattr(record.response_time, "as_dict"):
+            result["timing"] = record.response_time.as_dict()
+    except requests.exceptions.RequestException as e:
+        result["error"] = f"Failed to fetch data from API: {e}"
+    except Exception as e:
+        result["error"] = f"Failed to process site data: {e}"
+    result["elapsed"] = round(time.time() - start_time, 3)
+    return result
+
+
+def to_json_line(result: dict) -> str:
+    """
+    Serializes a result as one JSON line: the record's fields plus the run metadata.
+    """
+    meta = {key: value for key, value in result.items() if key != "record"}
+    if result["record"] is not None:
+        return result["record"].to_json(**meta)
+    return dumps({"domain": normalize_domain(result["input"]), **meta})
+
+
+def analyze_domains(domains, max_workers: int = DEFAULT_WORKERS):
+    """
+    Analyzes domains concurrently with at most `max_workers` requests in flight.
+
+    Yields one result per unique domain in completion order, so callers can
+    stream results while the rest of the batch is still running. Inputs that
+    normalize to the same domain are analyzed once, under the first of them.
+    """
+    unique = {}
+    for domain in domains:
+        if domain:
+            unique.setdefault(normalize_domain(domain), domain)
+    unique = list(unique.values())
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bulk-seo") as executor:
+        futures = [executor.submit(analyze_one, domain) for domain in unique]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def run_batch(domains, output, max_workers: int = DEFAULT_WORKERS) -> dict:
+    """
+    Runs a batch and writes each record to `output` as a JSON line as soon as it finishes.
+    Returns a summary of the run.
+    """
+    start_time = time.time()
+    succeeded = failed = 0
+    for result in analyze_domains(domains, max_workers=max_workers):
+        output.write(to_json_line(result) + "\n")
+        output.flush()
+        if result["error"]:
+            failed += 1
+            logging.warning(f"{result['input']}: {result['error']}")
+        else:
+            succeeded += 1
+    elapsed = time.time() - start_time
+    return {
+        "domains": succeeded + failed,
+        "succeeded": succeeded,
+        "failed": failed,
+        "elapsed": round(elapsed, 3),
+        "domains_per_second": round((succeeded + failed) / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze many domains concurrently and write JSONL results.")
+    parser.add_argument("domains", nargs="*", help="Domains or URLs to analyze")
+    parser.add_argument("-f", "--file", help="File with one domain per line (- for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file (default: stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent requests")
+    args = parser.parse_args(argv)
+
+    domains = list(args.domains)
+    if args.file:
+        domains.extend(read_domains(args.file))
+    if not domains:
+        parser.error("no domains given")
+
+    output = sys.stdout if args.output == "-" else open(args.output, "a")
+    try:
+        summary = run_batch(domains, output, max_workers=max(1, args.workers))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(json.dumps(summary), file=sys.stderr)
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
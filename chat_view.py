@@ -0,0 +1,63 @@
+import copy
+import html
+import json
+import os
+
+CHAT_HISTORY_LIMIT = int(os.getenv("SEO_CHAT_HISTORY_LIMIT", 200))  # Messages kept in session state
+CHAT_PAGE_SIZE = int(os.getenv("SEO_CHAT_PAGE_SIZE", 20))  # Messages shown before "Load older"
+
+CONTAINER_OPEN = (
+    '<div style="max-height: 400px; overflow-y: auto; border: 1px solid #ccc; '
+    'padding: 10px; border-radius: 5px;">'
+)
+SEPARATOR = "<hr style='border: none; border-top: 1px solid #ccc; margin: 10px 0;'>"
+SPEAKERS = {
+    "user": "<strong style='color: #007bff;'>You:</strong>",
+    "agent": "<strong style='color: #28a745;'>AI Agent:</strong>",
+}
+
+
+def render_message(msg: dict) -> str:
+    """
+    Returns the HTML of one message, rendering it only once: the fragment is
+    cached on the message itself, next to the role and content it was rendered
+    from, and re-rendered when either changes (structured content is compared
+    against a copy, so in-place edits are caught too).
+    """
+    content = msg["content"]
+    if msg.get("html") is not None and msg.get("html_source") == (msg["role"], content):
+        return msg["html"]
+    if isinstance(content, (dict, list)):
+        body = f"<pre style='white-space: pre-wrap;'>{html.escape(json.dumps(content, indent=1, default=str))}</pre>"
+    else:
+        body = html.escape(str(content)).replace("\n", "<br>")
+    speaker = SPEAKERS["user"] if msg["role"] == "user" else SPEAKERS["agent"]
+    msg["html"] = f"<p>{speaker} {body}</p>"
+    msg["html_source"] = (msg["role"], copy.deepcopy(content) if isinstance(content, (dict, list)) else content)
+    return msg["html"]
+
+
+def render_history(chat_history: list, visible: int) -> str:
+    """
+    Renders the newest `visible` messages, newest first.
+    """
+    page = chat_history[-visible:] if visible < len(chat_history) else chat_history
+    fragments = [render_message(msg) for msg in reversed(page)]
+    return CONTAINER_OPEN + SEPARATOR.join(fragments) + "</div>"
+
+
+def trim_history(session_state, limit: int = CHAT_HISTORY_LIMIT, archive=None) -> int:
+    """
+    Keeps at most `limit` messages in the session; older ones are passed to
+    `archive(messages)` before being dropped. Returns how many were removed.
+    """
+    chat_history = session_state["chat_history"]
+    overflow = len(chat_history) - limit
+    if overflow <= 0:
+        return 0
+    older = chat_history[:overflow]
+    if archive is not None:
+        archive([{"role": msg["role"], "content": msg["content"]} for msg in older])
+    del chat_history[:overflow]
+    session_state["archived_messages"] = session_state.get("archived_messages", 0) + overflow
+    return overflow
@@ -0,0 +1,167 @@
+import argparse
+import json
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from fetch_seo_data import analyze_domain_record, normalize_domain
+from rate_limiter import BATCH
+
+DEFAULT_DEPTH = 2
+DEFAULT_WORKERS = 8
+DEFAULT_MAX_NODES = 500
+
+
+class CompetitorGraph:
+    """
+    Adjacency structure of domains linked by SimilarSites.
+
+    `nodes` maps a domain to its attributes (hops from the nearest seed,
+    visits, category, title, whether it was fetched); `edges` maps a fetched
+    domain to the domains listed as similar to it.
+    """
+
+    def __init__(self, seeds=None):
+        self.seeds = list(seeds or [])
+        self.nodes = {}
+        self.edges = {}
+        self.errors = {}
+
+    def add_node(self, domain, hops, **attributes):
+        node = self.nodes.get(domain)
+        if node is None:
+            node = self.nodes[domain] = {"hops": hops, "visits": 0, "category": None, "title": None, "fetched": False}
+        node["hops"] = min(node["hops"], hops)
+        # Fetched values win over the summary listed by another site
+        for key, value in attributes.items():
+            if value is not None and (key == "fetched" or not node["fetched"] or node.get(key) is None):
+                node[key] = value
+        return node
+
+    def add_record(self, record, hops):
+        """
+        Adds a fetched SiteRecord and the similar sites it lists.
+        """
+        domain = normalize_domain(record.domain)
+        self.add_node(domain, hops, visits=record.visits, category=record.category,
+                      title=record.title, fetched=True)
+        neighbors = []
+        for site in record.similar_sites:
+            neighbor = normalize_domain(site.domain)
+            self.add_node(neighbor, hops + 1, visits=site.visits, title=site.title)
+            neighbors.append(neighbor)
+        self.edges[domain] = neighbors
+        return neighbors
+
+    def neighbors(self, domain) -> list:
+        return self.edges.get(normalize_domain(domain), [])
+
+    def top_by_visits(self, n: int = 10, max_hops: int = DEFAULT_DEPTH, include_seeds: bool = False) -> list:
+        """
+        Returns the `n` domains with the most visits within `max_hops` of a seed.
+        """
+        candidates = [
+            {"domain": domain, **node}
+            for domain, node in self.nodes.items()
+            if node["hops"] <= max_hops and (include_seeds or node["hops"] > 0)
+        ]
+        return sorted(candidates, key=lambda node: node["visits"] or 0, reverse=True)[:n]
+
+    def by_category(self, category: str) -> list:
+        return [domain for domain, node in self.nodes.items() if node["category"] == category]
+
+    def to_dict(self) -> dict:
+        return {"seeds": self.seeds, "nodes": self.nodes, "edges": self.edges, "errors": self.errors}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        graph = cls(data.get("seeds"))
+        graph.nodes = data.get("nodes", {})
+        graph.edges = data.get("edges", {})
+        graph.errors = data.get("errors", {})
+        return graph
+
+    def save(self, path: str):
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file)
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, "r") as file:
+            return cls.from_dict(json.load(file))
+
+
+def crawl(seeds, depth: int = DEFAULT_DEPTH, max_workers: int = DEFAULT_WORKERS,
+          max_nodes: int = DEFAULT_MAX_NODES, graph: CompetitorGraph = None) -> CompetitorGraph:
+    """
+    Expands SimilarSites breadth-first so the graph covers every domain
+    within `depth` hops of `seeds`.
+
+    Domains up to `depth - 1` hops away are fetched; the similar sites they
+    list make up the last hop without being fetched themselves, so depth=1
+    fetches only the seeds. Each level is fetched concurrently with at most
+    `max_workers` requests in flight, at batch priority. Domains are fetched
+    at most once; repeated lookups across crawls are served by the SimilarWeb
+    cache. Fetching stops once `max_nodes` domains have been fetched.
+
+    Passing an existing `graph` extends it: its unfetched nodes within reach
+    are fetched along with any new seeds, while fetched and failed nodes are
+    not requested again.
+    """
+    seeds = list(dict.fromkeys(normalize_domain(seed) for seed in seeds if seed))
+    graph = graph or CompetitorGraph()
+    graph.seeds.extend(seed for seed in seeds if seed not in graph.seeds)
+    for seed in seeds:
+        graph.add_node(seed, 0)
+    fetched = {domain for domain, node in graph.nodes.items() if node["fetched"]} | set(graph.errors)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="graph-crawl") as executor:
+        for hops in range(depth):
+            # Includes nodes left unfetched by an earlier, shallower crawl
+            frontier = [domain for domain, node in graph.nodes.items()
+                        if node["hops"] == hops and domain not in fetched]
+            frontier = frontier[:max(max_nodes - len(fetched), 0)]
+            if not frontier:
+                continue
+            fetched.update(frontier)
+            records = executor.map(_fetch, frontier)
+            for domain, (record, error) in zip(frontier, records):
+                if error is not None:
+                    graph.errors[domain] = error
+                    logging.warning(f"Competitor crawl failed for {domain}: {error}")
+                    continue
+                graph.add_record(record, hops)
+    return graph
+
+
+def _fetch(domain):
+    try:
+        return analyze_domain_record(domain, priority=BATCH), None
+    except Exception as e:
+        return None, str(e)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crawl the SimilarSites competitor graph of one or more domains.")
+    parser.add_argument("domains", nargs="+", help="Seed domains or URLs")
+    parser.add_argument("-d", "--depth", type=int, default=DEFAULT_DEPTH, help="Hops from the seeds covered by the graph")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent requests")
+    parser.add_argument("--max-nodes", type=int, default=DEFAULT_MAX_NODES, help="Maximum domains to fetch")
+    parser.add_argument("--top", type=int, default=10, help="Print the top N domains by visits")
+    parser.add_argument("-o", "--output", help="Write the graph as JSON to this file")
+    args = parser.parse_args(argv)
+
+    graph = crawl(args.domains, depth=args.depth, max_workers=max(1, args.workers), max_nodes=args.max_nodes)
+    if args.output:
+        graph.save(args.output)
+    print(json.dumps({
+        "nodes": len(graph.nodes),
+        "fetched": sum(1 for node in graph.nodes.values() if node["fetched"]),
+        "errors": len(graph.errors),
+        "top_by_visits": graph.top_by_visits(args.top, max_hops=args.depth),
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+import logging
+import os
+import re
+import threading
+
+from langchain.memory import ConversationBufferMemory, ConversationSummaryBufferMemory
+from langchain_core.callbacks import BaseCallbackHandler
+
+MEMORY_MODE = os.getenv("SEO_MEMORY_MODE", "budget")  # "budget" or "buffer" (unbounded)
+MEMORY_TOKEN_BUDGET = int(os.getenv("SEO_MEMORY_TOKEN_BUDGET", 1200))
+MAX_STORED_OUTPUT_CHARS = int(os.getenv("SEO_MEMORY_MAX_OUTPUT_CHARS", 600))
+MAX_STORED_OBSERVATION_CHARS = int(os.getenv("SEO_MEMORY_MAX_OBSERVATION_CHARS", 200))
+
+DOMAIN_PATTERN = re.compile(r"\b(?:[a-zA-Z0-9-]+\.)+[a-zA-Z]{2,}\b")
+
+
+def compact_output(text) -> str:
+    """
+    Replaces a long answer (typically a full SEO record) with a short
+    reference; the full record stays in the session state.
+    """
+    text = str(text)
+    if len(text) <= MAX_STORED_OUTPUT_CHARS:
+        return text
+    match = DOMAIN_PATTERN.search(text)
+    subject = f"SEO data for {match.group(0)}" if match else "a long answer"
+    return f"{text[:MAX_STORED_OUTPUT_CHARS]}... [truncated, see {subject} in the session]"
+
+
+def compact_steps(steps) -> str:
+    """
+    Describes the agent's tool calls as short references to their results;
+    the full results (e.g. SEO records) stay in the session.
+    """
+    lines = []
+    for action, observation in steps:
+        text = str(observation)
+        if len(text) > MAX_STORED_OBSERVATION_CHARS:
+            text = f"{text[:MAX_STORED_OBSERVATION_CHARS]}... [truncated, full result in the session]"
+        lines.append(f"[{action.tool}({action.tool_input}) -> {text}]")
+    return "\n".join(lines)
+
+
+_tokenizer_missing = False
+
+
+def count_tokens(llm, messages) -> int:
+    """
+    Counts the tokens of `messages` with the model's tokenizer, or estimates
+    about four characters per token when the tokenizer is not installed
+    (ChatOpenAI needs the optional tiktoken package).
+    """
+    global _tokenizer_missing
+    if not _tokenizer_missing:
+        try:
+            return llm.get_num_tokens_from_messages(messages)
+        except ImportError as e:
+            _tokenizer_missing = True
+            logging.warning(f"Estimating token counts from message length: {e}")
+    return sum(len(str(message.content)) // 4 + 4 for message in messages)
+
+
+class TokenBudgetMemory(ConversationSummaryBufferMemory):
+    """
+    Keeps recent turns verbatim within a token budget and folds older turns
+    into a running summary. Long answers and the results of the turn's tool
+    calls are stored as compact references.
+    """
+
+    def save_context(self, inputs, outputs):
+        output = compact_output(outputs.get("output", ""))
+        steps = outputs.get("intermediate_steps")
+        if steps:
+            output = f"{compact_steps(steps)}\n{output}"
+        super().save_context(inputs, {"output": output})
+
+    def prune(self):
+        # Same as the parent, counting tokens without requiring tiktoken
+        buffer = self.chat_memory.messages
+        if count_tokens(self.llm, buffer) <= self.max_token_limit:
+            return
+        pruned_memory = []
+        while buffer and count_tokens(self.llm, buffer) > self.max_token_limit:
+            pruned_memory.append(buffer.pop(0))
+        self.moving_summary_buffer = self.predict_new_summary(pruned_memory, self.moving_summary_buffer)
+
+
+def create_memory(llm, mode: str = MEMORY_MODE, token_budget: int = MEMORY_TOKEN_BUDGET):
+    """
+    Creates the per-session conversation memory. `llm` is used to count
+    tokens and to summarize older turns in "budget" mode.
+    """
+    if mode == "buffer":
+        return ConversationBufferMemory(memory_key="chat_history", output_key="output", return_messages=True)
+    return TokenBudgetMemory(
+        llm=llm,
+        max_token_limit=token_budget,
+        memory_key="chat_history",
+        output_key="output",  # The agent also returns its intermediate steps
+        return_messages=True,
+    )
+
+
+class PromptTokenLogger(BaseCallbackHandler):
+    """
+    Logs the number of prompt tokens sent on every LLM call.
+    """
+
+    def __init__(self, llm):
+        self.llm = llm
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.last_prompt_tokens = 0
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        try:
+            tokens = sum(count_tokens(self.llm, batch) for batch in messages)
+        except Exception as e:
+            logging.debug(f"Could not count prompt tokens: {e}")
+            return
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += tokens
+            self.last_prompt_tokens = tokens
+        logging.info(f"LLM call with {tokens} prompt tokens.")
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "prompt_tokens": self.prompt_tokens,
+                "avg_prompt_tokens": self.prompt_tokens / self.calls if self.calls else 0.0,
+                "last_prompt_tokens": self.last_prompt_tokens,
+            }
@@ -0,0 +1,220 @@
+import html
+import logging
+import os
+import smtplib
+import threading
+import time
+from string import Template
+
+from email_queue import build_message, get_sender_credentials, is_transient_error, open_smtp_connection
+from tracing import span
+
+DIGEST_INTERVAL = float(os.getenv("SEO_DIGEST_INTERVAL", 300))  # Seconds between automatic flushes
+DIGEST_SIMILAR_SITES = int(os.getenv("SEO_DIGEST_SIMILAR_SITES", 6))
+
+# Templates are compiled once at import; rendering only substitutes values
+SUBJECT_TEMPLATE = Template("SEO digest: $count domain$plural ($domains)")
+TEXT_SECTION_TEMPLATE = Template(
+    "== $domain ==\n"
+    "Title: $title\n"
+    "Description: $description\n"
+    "Visits: $visits\n"
+    "Key Words: $tags\n"
+    "Similar Sites:\n"
+    "$similar_sites\n"
+)
+TEXT_TEMPLATE = Template(
+    "Here is the summary of SEO data for $count domain$plural:\n\n"
+    "$sections\n"
+    "Message from Agent_SEO"
+)
+HTML_SECTION_TEMPLATE = Template(
+    "<h3>$domain</h3>"
+    "<p><strong>Title:</strong> $title<br>"
+    "<strong>Description:</strong> $description<br>"
+    "<strong>Visits:</strong> $visits<br>"
+    "<strong>Key Words:</strong> $tags</p>"
+    "<ul>$similar_sites</ul>"
+)
+HTML_TEMPLATE = Template(
+    "<html><body>"
+    "<p>Here is the summary of SEO data for $count domain$plural:</p>"
+    "$sections"
+    "<p>Message from Agent_SEO</p>"
+    "</body></html>"
+)
+
+
+def _section_values(seo_data: dict, escape=None) -> dict:
+    escape = escape or (lambda value: value)
+    return {
+        "domain": escape(str(seo_data.get("domain", "Unknown Domain"))),
+        "title": escape(str(seo_data.get("title", "No title found"))),
+        "description": escape(str(seo_data.get("description", "No description found"))),
+        "visits": seo_data.get("visits", 0),
+        "tags": escape(", ".join(seo_data.get("tags") or []) or "No tags found"),
+    }
+
+
+def render_digest(reports: list):
+    """
+    Renders the subject, plain-text body and HTML body of a digest covering
+    every SEO report in `reports`.
+    """
+    text_sections, html_sections = [], []
+    for seo_data in reports:
+        similar = seo_data.get("similar_sites", [])[:DIGEST_SIMILAR_SITES]
+        text_sections.append(TEXT_SECTION_TEMPLATE.substitute(
+            _section_values(seo_data),
+            similar_sites="\n".join(f"- {site['domain']}: {site['title']}" for site in similar),
+        ))
+        html_sections.append(HTML_SECTION_TEMPLATE.substitute(
+            _section_values(seo_data, html.escape),
+            similar_sites="".join(
+                f"<li>{html.escape(str(site['domain']))}: {html.escape(str(site['title']))}</li>" for site in similar
+            ),
+        ))
+    count = len(reports)
+    plural = "" if count == 1 else "s"
+    domains = ", ".join(str(seo_data.get("domain", "Unknown Domain")) for seo_data in reports[:3])
+    if count > 3:
+        domains += ", ..."
+    subject = SUBJECT_TEMPLATE.substitute(count=count, plural=plural, domains=domains)
+    text = TEXT_TEMPLATE.substitute(count=count, plural=plural, sections="\n".join(text_sections))
+    html_body = HTML_TEMPLATE.substitute(count=count, plural=plural, sections="".join(html_sections))
+    return subject, text, html_body
+
+
+class DigestBatcher:
+    """
+    Collects SEO reports per recipient and sends them as one digest each.
+
+    A flush renders every pending digest and sends them all over a single
+    SMTP connection. Reports whose digest hit a transient failure stay
+    pending for the next flush; permanent failures (rejected login or
+    recipient, missing credentials) are dropped and counted. With `interval` set, a background thread flushes
+    automatically.
+    """
+
+    def __init__(self, interval: float = DIGEST_INTERVAL):
+        self.interval = interval
+        self._pending = {}  # recipient -> {domain: seo_data}, latest report per domain wins
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+        self.stats = {"reports": 0, "digests_sent": 0, "domains_sent": 0, "failed": 0, "dropped": 0,
+                      "connections": 0, "send_seconds": 0.0}
+
+    def add(self, recipient_email: str, seo_data: dict) -> int:
+        """
+        Adds a report to the recipient's pending digest and returns how many domains it holds.
+        """
+        with self._lock:
+            reports = self._pending.setdefault(recipient_email, {})
+            reports[seo_data.get("domain", "Unknown Domain")] = seo_data
+            self.stats["reports"] += 1
+            self._schedule()
+            return len(reports)
+
+    def _schedule(self):
+        # Caller holds self._lock
+        if self.interval and self._timer is None:
+            self._timer = threading.Timer(self.interval, self._auto_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def pending(self) -> dict:
+        """
+        Returns the number of pending domains per recipient.
+        """
+        with self._lock:
+            return {recipient: len(reports) for recipient, reports in self._pending.items()}
+
+    def _auto_flush(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        except Exception as e:
+            logging.error(f"Digest flush failed: {e}")
+
+    def flush(self) -> dict:
+        """
+        Sends every pending digest over one SMTP connection and returns the
+        throughput of this flush.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batches, self._pending = self._pending, {}
+            result = {"messages": 0, "domains": 0, "failed": 0, "dropped": 0, "seconds": 0.0}
+            if not batches:
+                return result
+
+            start_time = time.perf_counter()
+            sent, dropped = set(), set()
+            try:
+                sender_email, sender_password = get_sender_credentials()
+                with span("smtp_digest", recipients=len(batches)), \
+                        open_smtp_connection(sender_email, sender_password) as server:
+                    self.stats["connections"] += 1
+                    for recipient_email, reports in batches.items():
+                        subject, text, html_body = render_digest(list(reports.values()))
+                        msg = build_message(sender_email, recipient_email, subject, text, html_body)
+                        try:
+                            server.sendmail(sender_email, recipient_email, msg.as_string())
+                        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError) as e:
+                            logging.error(f"Failed to send digest to {recipient_email}: {e}")
+                            if not is_transient_error(e):
+                                dropped.add(recipient_email)
+                            continue
+                        sent.add(recipient_email)
+                        result["messages"] += 1
+                        result["domains"] += len(reports)
+            except (smtplib.SMTPException, OSError, ValueError) as e:
+                logging.error(f"Digest flush interrupted after {len(sent)} digests: {e}")
+                if not is_transient_error(e):
+                    # Missing credentials or a rejected login fail the same way on every retry
+                    dropped.update(recipient for recipient in batches if recipient not in sent)
+
+            # Permanent failures are dropped, everything else is retried on the next flush
+            retry = {recipient: reports for recipient, reports in batches.items()
+                     if recipient not in sent and recipient not in dropped}
+            if retry:
+                self._requeue(retry)
+            result["failed"] = len(batches) - len(sent)
+            result["dropped"] = len(dropped - sent)
+            result["seconds"] = round(time.perf_counter() - start_time, 4)
+            elapsed = max(result["seconds"], 1e-9)
+            result["messages_per_second"] = round(result["messages"] / elapsed, 2)
+            result["domains_per_second"] = round(result["domains"] / elapsed, 2)
+
+            self.stats["digests_sent"] += result["messages"]
+            self.stats["domains_sent"] += result["domains"]
+            self.stats["failed"] += result["failed"]
+            self.stats["dropped"] += result["dropped"]
+            self.stats["send_seconds"] += result["seconds"]
+            logging.info(f"Digest flush: {result}")
+            return result
+
+    def _requeue(self, batches: dict):
+        # Newer reports added during the flush take precedence over the failed ones
+        with self._lock:
+            for recipient_email, reports in batches.items():
+                pending = self._pending.setdefault(recipient_email, {})
+                for domain, seo_data in reports.items():
+                    pending.setdefault(domain, seo_data)
+            self._schedule()
+
+    def throughput(self) -> dict:
+        """
+        Returns cumulative digests and domains sent per second of SMTP time.
+        """
+        elapsed = self.stats["send_seconds"]
+        return {
+            "messages_per_second": round(self.stats["digests_sent"] / elapsed, 2) if elapsed else 0.0,
+            "domains_per_second": round(self.stats["domains_sent"] / elapsed, 2) if elapsed else 0.0,
+        }
+
+
+# Process-wide digest batcher
+digest_batcher = DigestBatcher()
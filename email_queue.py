@@ -0,0 +1,254 @@
+import logging
+import os
+import queue
+import random
+import smtplib
+import threading
+import time
+import uuid
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from dotenv import load_dotenv
+
+from tracing import span
+
+# Load environment variables
+load_dotenv()
+
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() != "false"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", 30))
+SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", 60))  # Close the connection after this much idle time
+SMTP_MAX_RETRIES = int(os.getenv("SMTP_MAX_RETRIES", 3))
+
+
+def get_sender_credentials():
+    """
+    Reads the sender address and password from the environment.
+    """
+    sender_email = os.getenv("SENDER_EMAIL")
+    sender_password = os.getenv("SENDER_PASSWORD")
+    if not sender_email or not sender_password:
+        raise ValueError("Sender email or password not set in environment variables.")
+    return sender_email, sender_password
+
+
+def open_smtp_connection(sender_email, sender_password):
+    """
+    Opens an authenticated SMTP connection.
+    """
+    server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+    if SMTP_STARTTLS:
+        server.starttls()
+    server.login(sender_email, sender_password)
+    return server
+
+
+def build_message(sender_email, recipient_email, subject, body, html_body=None):
+    """
+    Builds the MIME message, with an optional HTML alternative.
+    """
+    msg = MIMEMultipart("alternative" if html_body else "mixed")
+    msg['From'] = sender_email
+    msg['To'] = recipient_email
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    if html_body:
+        msg.attach(MIMEText(html_body, 'html'))
+    return msg
+
+
+def is_transient_error(error) -> bool:
+    """
+    Connection drops, timeouts and 4xx replies are worth retrying;
+    authentication failures, unsupported commands and 5xx replies are not.
+    """
+    # SMTPException subclasses OSError, so SMTP errors are classified before socket errors
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return bool(error.recipients) and all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500 and not isinstance(error, smtplib.SMTPAuthenticationError)
+    if isinstance(error, smtplib.SMTPException):
+        return False
+    return isinstance(error, OSError)
+
+
+class DeliveryTicket:
+    """
+    Tracks one queued message through delivery.
+    """
+
+    def __init__(self, recipient_email, subject, body, html_body=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.recipient_email = recipient_email
+        self.subject = subject
+        self.body = body
+        self.html_body = html_body
+        self.status = "queued"  # queued -> sending -> sent | failed
+        self.attempts = 0
+        self.error = None
+        self.created_at = time.time()
+        self.sent_at = None
+        self._done = threading.Event()
+
+    def wait(self, timeout=None) -> bool:
+        """
+        Blocks until the message is sent or has failed; returns True once finished.
+        """
+        return self._done.wait(timeout)
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "recipient": self.recipient_email,
+            "subject": self.subject,
+            "status": self.status,
+            "attempts": self.attempts,
+            "error": self.error,
+            "created_at": self.created_at,
+            "sent_at": self.sent_at,
+        }
+
+
+class MailQueue:
+    """
+    Outbound mail queue drained by one background worker.
+
+    The worker keeps a single authenticated SMTP connection open between
+    messages, closes it after `idle_timeout` seconds without mail and
+    reconnects on demand. Transient failures are retried with backoff.
+    """
+
+    def __init__(self, idle_timeout: float = SMTP_IDLE_TIMEOUT, max_retries: int = SMTP_MAX_RETRIES,
+                 max_tickets: int = 1000):
+        self.idle_timeout = idle_timeout
+        self.max_retries = max_retries
+        self.max_tickets = max_tickets
+        self._queue = queue.Queue()
+        self._tickets = {}
+        self._lock = threading.Lock()
+        self._worker = None
+        self._server = None
+        self._credentials = None
+        self._listeners = []
+        self.stats = {"queued": 0, "sent": 0, "failed": 0, "retries": 0, "connections": 0}
+
+    def _count(self, name: str, amount=1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def add_listener(self, callback):
+        """
+        Calls `callback(ticket)` when a ticket is queued and whenever its
+        status changes, e.g. to publish statuses to other processes.
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, ticket):
+        for callback in self._listeners:
+            try:
+                callback(ticket)
+            except Exception as e:
+                logging.warning(f"Mail queue listener failed for ticket {ticket.id}: {e}")
+
+    def submit(self, subject, body, recipient_email, html_body=None) -> DeliveryTicket:
+        """
+        Queues a message and returns its delivery ticket immediately.
+        """
+        # Fail fast on missing configuration instead of inside the worker
+        get_sender_credentials()
+        ticket = DeliveryTicket(recipient_email, subject, body, html_body)
+        with self._lock:
+            self._tickets[ticket.id] = ticket
+            if len(self._tickets) > self.max_tickets:
+                finished = [t for t in self._tickets.values() if t.status in ("sent", "failed")]
+                for old in finished[:len(self._tickets) - self.max_tickets]:
+                    del self._tickets[old.id]
+            self.stats["queued"] += 1
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="smtp-worker", daemon=True)
+                self._worker.start()
+        self._notify(ticket)
+        self._queue.put(ticket)
+        return ticket
+
+    def get_ticket(self, ticket_id):
+        with self._lock:
+            return self._tickets.get(ticket_id)
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _connection(self):
+        credentials = get_sender_credentials()
+        if self._server is not None and credentials == self._credentials:
+            try:
+                if self._server.noop()[0] == 250:
+                    return self._server
+            except smtplib.SMTPException:
+                pass
+        self._close()
+        with span("smtp_connect", queued=True):
+            self._server = open_smtp_connection(*credentials)
+        self._credentials = credentials
+        self._count("connections")
+        return self._server
+
+    def _close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+    def _deliver(self, ticket):
+        ticket.status = "sending"
+        self._notify(ticket)
+        for attempt in range(self.max_retries + 1):
+            ticket.attempts += 1
+            try:
+                server = self._connection()
+                msg = build_message(self._credentials[0], ticket.recipient_email,
+                                    ticket.subject, ticket.body, ticket.html_body)
+                with span("smtp_send", queued=True):
+                    server.sendmail(self._credentials[0], ticket.recipient_email, msg.as_string())
+                ticket.status = "sent"
+                ticket.sent_at = time.time()
+                self._count("sent")
+                logging.info(f"Email sent to {ticket.recipient_email} (ticket {ticket.id})")
+                return
+            except Exception as e:
+                ticket.error = str(e)
+                self._close()
+                if attempt == self.max_retries or not is_transient_error(e):
+                    break
+                self._count("retries")
+                delay = random.uniform(0, min(30, 2 ** attempt))
+                logging.warning(f"Transient SMTP error for ticket {ticket.id}: {e}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+        ticket.status = "failed"
+        self._count("failed")
+        logging.error(f"Failed to send email to {ticket.recipient_email} (ticket {ticket.id}): {ticket.error}")
+
+    def _run(self):
+        while True:
+            try:
+                ticket = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                self._close()  # Idle: release the connection, reconnect on the next message
+                continue
+            try:
+                self._deliver(ticket)
+            finally:
+                self._notify(ticket)
+                ticket._done.set()
+                self._queue.task_done()
+
+
+# Process-wide outbound mail queue
+mail_queue = MailQueue()
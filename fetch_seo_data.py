@@ -1,29 +1,164 @@
 import json
+import os
 import re
-import requests
+import threading
 import time
+import requests
 
 from streamlit import session_state
 
+from http_client import get_json
+from rate_limiter import INTERACTIVE, rapidapi_limiter
+from result_store import get_result_store
+from seo_cache import seo_cache
+from seo_models import SiteRecord
+from tracing import span, tracer
+
+# SimilarWeb endpoint, overridable to point at a local stand-in for load tests
+SIMILARWEB_API_URL = os.getenv("SIMILARWEB_API_URL", "https://similarweb-insights.p.rapidapi.com/similar-sites")
+
+# Limits of the compact tool output shown to the agent
+COMPACT_TOP_N = int(os.getenv("SEO_COMPACT_TOP_N", 5))
+COMPACT_DESCRIPTION_CHARS = int(os.getenv("SEO_COMPACT_DESCRIPTION_CHARS", 120))
+
+# Key schema of the compact view, shared with the tool description
+COMPACT_SCHEMA = "d=domain, t=title, desc=description, cat=category, v=visits, tags, sim=[[domain, visits, top country]], n_sim=similar sites found"
+
 # Extract domain from user prompt
 def extract_domain(user_input: str) -> str:
     pattern = r"https?://[a-zA-Z0-9./-]+|[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
     matches = re.findall(pattern, user_input)
     return matches[0] if matches else None
 
-# Make the API request to fetch SEO data
-def make_api_request(domain):
-    url = "https://similarweb-insights.p.rapidapi.com/similar-sites"
+# Normalize a domain or URL so equivalent inputs share one cache entry
+def normalize_domain(domain: str) -> str:
+    domain = domain.strip().lower()
+    domain = re.sub(r"^https?://", "", domain)
+    domain = domain.split("/")[0].split(":")[0]
+    if domain.startswith("www."):
+        domain = domain[4:]
+    return domain.rstrip(".")
+
+class _Call:
+    """
+    An upstream call shared by every caller asking for the same key.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one in-flight call.
+    Every caller receives the leader's result, or has its exception re-raised.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key, func):
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if leader:
+            try:
+                call.result = func()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "upstream_calls": self.calls - self.coalesced,
+                "in_flight": len(self._calls),
+            }
+
+
+# Process-wide coalescing of identical SimilarWeb lookups
+upstream_flight = SingleFlight()
+
+# Returns how many lookups were coalesced into an already in-flight request
+def get_coalescing_stats() -> dict:
+    return upstream_flight.stats()
+
+# Make the API request to fetch SEO data, served from the cache when possible.
+# Batch and background callers pass priority=BATCH so interactive lookups go first.
+def make_api_request(domain, priority: int = INTERACTIVE):
+    key = normalize_domain(domain)
+    timing = {"response_time": 0.0}  # A cache hit costs no upstream time
+
+    def load():
+        site_data, response_time = upstream_flight.do(key, lambda: request_similar_sites(key, priority))
+        timing["response_time"] = response_time
+        return site_data, float(response_time)
+
+    site_data, _ = seo_cache.get_or_fetch(key, load)
+    return site_data, timing["response_time"]
+
+# Read the RapidAPI key from the environment
+def get_rapidapi_key() -> str:
+    api_key = os.getenv("RAPIDAPI_KEY")
+    if not api_key:
+        raise ValueError("RapidAPI key not set in environment variables (RAPIDAPI_KEY).")
+    return api_key
+
+# Call the SimilarWeb API directly, bypassing the cache.
+# The response time excludes connection setup and carries the full breakdown.
+def request_similar_sites(domain, priority: int = INTERACTIVE):
+    url = SIMILARWEB_API_URL
     querystring = {"domain": domain}
     headers = {
-        "x-rapidapi-key": "15fdc58102mshfcda37031cb00d7p1a6b47jsn12d8c5ac4e67",
+        "x-rapidapi-key": get_rapidapi_key(),
         "x-rapidapi-host": "similarweb-insights.p.rapidapi.com"
     }
-    start_time = time.time()
-    response = requests.get(url, headers=headers, params=querystring)
-    response_time = time.time() - start_time
-    response.raise_for_status()
-    return response.json(), response_time
+    waited = [0.0]
+
+    def wait_for_slot():
+        with span("rate_limit_wait", domain=domain, priority=priority):
+            waited[0] += rapidapi_limiter.acquire(priority)
+
+    # The request span excludes time queued in the rate limiter, traced as rate_limit_wait
+    start_time = time.perf_counter()
+    error = None
+    try:
+        return get_json(
+            url,
+            headers=headers,
+            params=querystring,
+            before_request=wait_for_slot,
+            on_response=rapidapi_limiter.observe,
+        )
+    except BaseException as e:
+        error = repr(e)
+        raise
+    finally:
+        tracer.record("rapidapi_request", max(time.perf_counter() - start_time - waited[0], 0.0), error=error,
+                      attributes={"domain": domain, "rate_limit_wait": round(waited[0], 4)})
 
 # Parse the main site information from the response
 def parse_main_site_info(site_data):
@@ -58,57 +193,74 @@ def parse_image_data(site_data):
         "smartphone": images.get("Smartphone", "No smartphone image")
     }
 
-# Save SEO data to a text file
-def save_seo_data_to_file(seo_data: dict, file_name: str = "seo_data.txt"):
-    try:
-        with open(file_name, "w") as file:
-            file.write("SEO Data Summary\n")
-            file.write("=================\n")
-            file.write(f"Domain: {seo_data.get('domain', 'Unknown domain')}\n")
-            file.write(f"Title: {seo_data.get('title', 'No title found')}\n")
-            file.write(f"Description: {seo_data.get('description', 'No description found')}\n")
-            # Format tags as a comma-separated string
-            tags = ", ".join(seo_data.get('tags', [])) if seo_data.get('tags') else "No tags found"
-            file.write(f"Key Words: {tags}\n")
-            file.write(f"Category: {seo_data.get('category', 'No category found')}\n")
-            file.write(f"Visits: {seo_data.get('visits', 0)}\n")
-            file.write(f"Response Time: {seo_data.get('response_time', 0):.2f} seconds\n")
-            file.write("\nSimilar Sites:\n")
-            for site in seo_data.get("similar_sites", []):
-                file.write(f"- {site['domain']}: {site['title']}\n")
-        return True
-    except Exception as e:
-        return False
+# Format SEO data as the plain-text report offered for download
+def format_seo_report(seo_data: dict) -> str:
+    # Format tags as a comma-separated string
+    tags = ", ".join(seo_data.get('tags', [])) if seo_data.get('tags') else "No tags found"
+    lines = [
+        "SEO Data Summary",
+        "=================",
+        f"Domain: {seo_data.get('domain', 'Unknown domain')}",
+        f"Title: {seo_data.get('title', 'No title found')}",
+        f"Description: {seo_data.get('description', 'No description found')}",
+        f"Key Words: {tags}",
+        f"Category: {seo_data.get('category', 'No category found')}",
+        f"Visits: {seo_data.get('visits', 0)}",
+        f"Response Time: {seo_data.get('response_time', 0):.2f} seconds",
+        "",
+        "Similar Sites:",
+    ]
+    lines.extend(f"- {site['domain']}: {site['title']}" for site in seo_data.get("similar_sites", []))
+    return "\n".join(lines) + "\n"
+
+# Fetch and parse the SEO data of a single domain, without touching session state
+def analyze_domain(domain, priority: int = INTERACTIVE):
+    site_data, response_time = make_api_request(domain, priority)
+
+    # Process site data
+    with span("parse"):
+        main_info = parse_main_site_info(site_data)
+        similar_sites = parse_similar_sites(site_data)
+        #images = parse_image_data(site_data)
 
-# Main function to fetch and extract SEO data
-def fetch_seo_data(user_prompt, session_state, save_to_file: bool = False):
+    return {
+        **main_info,
+        #"images": images,
+        "similar_sites": similar_sites,
+        "response_time": response_time  # Include response time in the data
+    }
+
+# Fetch a domain as a slotted SiteRecord, which holds no reference to the raw response
+def analyze_domain_record(domain, priority: int = INTERACTIVE) -> SiteRecord:
+    site_data, response_time = make_api_request(domain, priority)
+    return SiteRecord.from_api(site_data, response_time)
+
+# Main function to fetch and extract SEO data.
+# save_to_file is the former name of store_result, still accepted from existing callers.
+def fetch_seo_data(user_prompt, session_state, store_result: bool = False, save_to_file: bool = None):
+    if save_to_file is not None:
+        store_result = save_to_file
     try:
         domain = extract_domain(user_prompt)
         if domain:
-            # Make API request and measure response time
-            site_data, response_time = make_api_request(domain)
-
-            # Process site data
-            main_info = parse_main_site_info(site_data)
-            similar_sites = parse_similar_sites(site_data)
-            #images = parse_image_data(site_data)
-
-            seo_data = {
-                **main_info,
-                #"images": images,
-                "similar_sites": similar_sites,
-                "response_time": response_time  # Include response time in the data
-            }
+            # Make API request, measure response time and process site data
+            seo_data = analyze_domain(domain)
 
-            # Save to file if requested
-            if save_to_file:
-                saved = save_seo_data_to_file(seo_data)
-                if not saved:
-                    session_state["last_seo_data"] = None
-                    return {"error": "Failed to save SEO data to file."}
+            # Persist a snapshot if requested; the write happens in the background
+            if store_result:
+                with span("store_save"):
+                    get_result_store().save(seo_data)
 
-            # Update session state
+            # Update session state, keeping the report in memory for downloads
             session_state["last_seo_data"] = seo_data
+            session_state["last_seo_report"] = format_seo_report(seo_data)
+
+            # Register the record so later emails and comparisons reuse it
+            # (imported here: session_workspace builds on this module)
+            from session_workspace import current_turn, get_workspace
+            get_workspace(session_state).add(
+                seo_data, turn=current_turn(session_state), report=session_state["last_seo_report"]
+            )
 
             return seo_data  # Return the dictionary directly
 
@@ -124,3 +276,48 @@ def fetch_seo_data(user_prompt, session_state, save_to_file: bool = False):
         session_state["last_seo_data"] = None
         return {"error": f"Failed to process site data: {e}"}
 
+# Shorten a text to a maximum number of characters
+def truncate(text, limit):
+    text = str(text)
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+# Build the compact view of an SEO record that is sent to the LLM
+def compact_seo_data(seo_data, top_n: int = COMPACT_TOP_N, description_chars: int = COMPACT_DESCRIPTION_CHARS):
+    if not seo_data or "error" in seo_data:
+        return seo_data
+    similar_sites = seo_data.get("similar_sites", [])
+    return {
+        "d": seo_data.get("domain"),
+        "t": truncate(seo_data.get("title", ""), description_chars),
+        "desc": truncate(seo_data.get("description", ""), description_chars),
+        "cat": seo_data.get("category"),
+        "v": seo_data.get("visits"),
+        "tags": seo_data.get("tags", [])[:10],
+        "sim": [[site.get("domain"), site.get("visits"), site.get("top_country")] for site in similar_sites[:top_n]],
+        "n_sim": len(similar_sites),
+    }
+
+# Size of full vs compact tool outputs, to measure the prompt savings
+compaction_stats = {"outputs": 0, "full_chars": 0, "compact_chars": 0}
+_compaction_lock = threading.Lock()
+
+# Serialize a fetch_seo_data result for the agent; the full record stays in session state
+def compact_tool_output(seo_data) -> str:
+    if seo_data is None:
+        return "No domain found in the input."
+    compact = json.dumps(compact_seo_data(seo_data), separators=(",", ":"), ensure_ascii=False)
+    full = json.dumps(seo_data, ensure_ascii=False)
+    with _compaction_lock:
+        compaction_stats["outputs"] += 1
+        compaction_stats["full_chars"] += len(full)
+        compaction_stats["compact_chars"] += len(compact)
+    return compact
+
+# Returns the characters saved by compacting tool outputs (about 4 characters per token)
+def get_compaction_stats() -> dict:
+    with _compaction_lock:
+        stats = dict(compaction_stats)
+    stats["saved_chars"] = stats["full_chars"] - stats["compact_chars"]
+    stats["saved_tokens_estimate"] = stats["saved_chars"] // 4
+    stats["ratio"] = stats["compact_chars"] / stats["full_chars"] if stats["full_chars"] else 1.0
+    return stats
@@ -0,0 +1,189 @@
+import logging
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+CONNECT_TIMEOUT = float(os.getenv("SEO_HTTP_CONNECT_TIMEOUT", 3.05))
+READ_TIMEOUT = float(os.getenv("SEO_HTTP_READ_TIMEOUT", 15))
+MAX_RETRIES = int(os.getenv("SEO_HTTP_MAX_RETRIES", 3))
+BACKOFF_BASE = float(os.getenv("SEO_HTTP_BACKOFF_BASE", 0.5))
+BACKOFF_MAX = float(os.getenv("SEO_HTTP_BACKOFF_MAX", 8))
+POOL_SIZE = int(os.getenv("SEO_HTTP_POOL_SIZE", 20))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class _ConnectTiming(threading.local):
+    """Per-thread time spent opening connections (TCP + TLS) during a request."""
+    seconds = 0.0
+    count = 0
+
+
+_connect_timing = _ConnectTiming()
+
+
+class TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start_time = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _connect_timing.seconds += time.perf_counter() - start_time
+            _connect_timing.count += 1
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        start_time = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _connect_timing.seconds += time.perf_counter() - start_time
+            _connect_timing.count += 1
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """
+    Keep-alive adapter whose connections record how long the handshake took.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+
+class ResponseTime(float):
+    """
+    Time spent on the API itself (server wait + body transfer), excluding
+    connection setup and retry backoff. Behaves like a float of seconds and
+    carries the full breakdown as attributes.
+    """
+
+    def __new__(cls, connect: float, server: float, transfer: float, total: float,
+                attempts: int = 1, reused_connection: bool = True):
+        value = super().__new__(cls, server + transfer)
+        value.connect = connect
+        value.server = server
+        value.transfer = transfer
+        value.total = total
+        value.attempts = attempts
+        value.reused_connection = reused_connection
+        return value
+
+    def __reduce__(self):
+        return (ResponseTime, (self.connect, self.server, self.transfer, self.total,
+                               self.attempts, self.reused_connection))
+
+    def as_dict(self) -> dict:
+        return {
+            "api": float(self),
+            "connect": self.connect,
+            "server": self.server,
+            "transfer": self.transfer,
+            "total": self.total,
+            "attempts": self.attempts,
+            "reused_connection": self.reused_connection,
+        }
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the process-wide pooled session, creating it on first use.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = TimedHTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def backoff_delay(attempt: int, retry_after=None) -> float:
+    """
+    Full-jitter exponential backoff, honoring a numeric Retry-After header.
+    """
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def get_json(url: str, headers: dict = None, params: dict = None,
+             timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), max_retries: int = MAX_RETRIES,
+             before_request=None, on_response=None):
+    """
+    Performs a GET over the pooled session and returns (json, ResponseTime).
+
+    Connection errors, timeouts, 429 and 5xx responses are retried with
+    jittered exponential backoff; the last failure is raised as a
+    requests.exceptions.RequestException. `before_request()` is called before
+    every attempt and `on_response(response)` after it, e.g. for rate limiting.
+    """
+    session = get_session()
+    start_time = time.perf_counter()
+    for attempt in range(max_retries + 1):
+        if before_request is not None:
+            before_request()
+        _connect_timing.seconds = 0.0
+        _connect_timing.count = 0
+        attempt_start = time.perf_counter()
+        try:
+            response = session.get(url, headers=headers, params=params, timeout=timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt == max_retries:
+                raise
+            delay = backoff_delay(attempt)
+            logging.warning(f"Request to {url} failed ({e}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+            continue
+
+        if on_response is not None:
+            on_response(response)
+        if response.status_code in RETRY_STATUSES and attempt < max_retries:
+            delay = backoff_delay(attempt, response.headers.get("Retry-After"))
+            logging.warning(f"Request to {url} returned {response.status_code}, retrying in {delay:.2f}s")
+            response.close()
+            time.sleep(delay)
+            continue
+
+        attempt_time = time.perf_counter() - attempt_start
+        response.raise_for_status()
+        # response.elapsed covers sending the request until the headers were parsed
+        headers_time = response.elapsed.total_seconds()
+        connect_time = min(_connect_timing.seconds, headers_time)
+        response_time = ResponseTime(
+            connect=connect_time,
+            server=max(headers_time - connect_time, 0.0),
+            transfer=max(attempt_time - headers_time, 0.0),
+            total=time.perf_counter() - start_time,
+            attempts=attempt + 1,
+            reused_connection=_connect_timing.count == 0,
+        )
+        return response.json(), response_time
@@ -0,0 +1,160 @@
+import re
+import threading
+import time
+
+from fetch_seo_data import fetch_seo_data, normalize_domain
+from manage_email import get_first_email, send_email
+
+# Requests longer than this are left to the agent, they are rarely plain commands
+MAX_COMMAND_WORDS = 12
+
+# Commands must start with an imperative verb; "check my email ..." or
+# "seo tips for ..." mention the words without asking for the action
+EMAIL_COMMAND = re.compile(r"^(please\s+)?(e-?mail|mail|send|forward)\b", re.IGNORECASE)
+ANALYZE_COMMAND = re.compile(r"^(please\s+)?(analy[sz]e|audit|check|fetch|inspect|look\s*up|report\s+on|scan)\b", re.IGNORECASE)
+# "analyze example.com and email it to ..." asks for both steps
+THEN_EMAIL = re.compile(r"\b(and|then)\s+(e-?mail|mail|send|forward)\b", re.IGNORECASE)
+# Emails are irreversible, so anything negated goes to the agent
+NEGATION = re.compile(r"\b(not|never|no|don'?t|doesn'?t|won'?t|stop|cancel)\b|n't\b", re.IGNORECASE)
+# Anything that needs reasoning rather than a single tool call goes to the agent
+FREE_FORM = re.compile(r"\?|\b(why|how|compare|versus|vs|explain|suggest|improve|should|what|which|and then)\b", re.IGNORECASE)
+DOMAIN_PATTERN = re.compile(r"https?://[a-zA-Z0-9./-]+|[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+# Matches ending like these are more likely file names than websites
+FILE_EXTENSIONS = {"cfg", "conf", "csv", "doc", "docx", "gif", "htm", "html", "ini", "jpeg", "jpg", "js", "json",
+                   "log", "md", "pdf", "png", "py", "sh", "toml", "txt", "xls", "xlsx", "xml", "yaml", "yml", "zip"}
+EMAIL_ADDRESS = re.compile(r"\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b")
+
+
+class RouteResult:
+    """
+    The outcome of a turn served without the LLM.
+    """
+
+    def __init__(self, action, output, elapsed):
+        self.action = action
+        self.output = output
+        self.elapsed = elapsed
+
+
+class RouterStats:
+    """
+    Counts routed vs agent turns and estimates the latency saved by routing.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routed_turns = 0
+        self.routed_seconds = 0.0
+        self.llm_turns = 0
+        self.llm_seconds = 0.0
+
+    def record_routed(self, seconds):
+        with self._lock:
+            self.routed_turns += 1
+            self.routed_seconds += seconds
+
+    def record_llm(self, seconds):
+        with self._lock:
+            self.llm_turns += 1
+            self.llm_seconds += seconds
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            avg_llm = self.llm_seconds / self.llm_turns if self.llm_turns else 0.0
+            avg_routed = self.routed_seconds / self.routed_turns if self.routed_turns else 0.0
+            total = self.routed_turns + self.llm_turns
+            return {
+                "routed_turns": self.routed_turns,
+                "llm_turns": self.llm_turns,
+                "routed_share": self.routed_turns / total if total else 0.0,
+                "avg_routed_seconds": round(avg_routed, 3),
+                "avg_llm_seconds": round(avg_llm, 3),
+                # Estimated from the average agent turn measured in this process
+                "saved_seconds": round(max(avg_llm - avg_routed, 0.0) * self.routed_turns, 3),
+            }
+
+
+router_stats = RouterStats()
+
+
+def format_seo_summary(seo_data) -> str:
+    """
+    Formats a fetch_seo_data result as a short chat answer.
+    """
+    if not seo_data:
+        return "I could not find a domain to analyze in your request."
+    if "error" in seo_data:
+        return f"Sorry, the SEO analysis failed: {seo_data['error']}"
+    tags = ", ".join(seo_data.get("tags", [])) or "No tags found"
+    similar = "\n".join(
+        f"- {site['domain']}: {site['title']}" for site in seo_data.get("similar_sites", [])[:5]
+    )
+    return (
+        f"SEO analysis for {seo_data.get('domain')}:\n"
+        f"Title: {seo_data.get('title')}\n"
+        f"Description: {seo_data.get('description')}\n"
+        f"Category: {seo_data.get('category')}\n"
+        f"Visits: {seo_data.get('visits')}\n"
+        f"Key Words: {tags}\n"
+        f"Similar Sites:\n{similar or '- None found'}"
+    )
+
+
+def _mentioned_domains(text: str) -> list:
+    return list(dict.fromkeys(normalize_domain(match) for match in DOMAIN_PATTERN.findall(text)))
+
+
+def classify(user_input: str):
+    """
+    Returns "send_email_summary", "fetch_seo_data", "fetch_and_email" (analyze
+    a domain, then email the report) or None when the request is not an
+    unambiguous command: free-form or negated requests, several domains or
+    file names, and verbs that are not the imperative at the start.
+    """
+    text = user_input.strip()
+    if not text or len(text.split()) > MAX_COMMAND_WORDS or FREE_FORM.search(text) or NEGATION.search(text):
+        return None
+    without_emails = EMAIL_ADDRESS.sub(" ", text)
+    domains = _mentioned_domains(without_emails)
+    if len(domains) > 1 or any(domain.rsplit(".", 1)[-1] in FILE_EXTENSIONS for domain in domains):
+        return None
+    domain = domains[0] if domains else None
+
+    if get_first_email(text):
+        if EMAIL_COMMAND.search(text):
+            return "send_email_summary"
+        if domain and ANALYZE_COMMAND.search(text) and THEN_EMAIL.search(text):
+            return "fetch_and_email"
+        return None
+    if not domain:
+        return None
+    # A bare domain or URL is treated as a request to analyze it
+    if ANALYZE_COMMAND.search(text) or len(text.split()) == 1:
+        return "fetch_seo_data"
+    return None
+
+
+def route(user_input: str, session_state):
+    """
+    Serves the turn directly when the request is an obvious command and
+    returns a RouteResult; returns None when the agent should handle it.
+    """
+    action = classify(user_input)
+    if action is None:
+        return None
+
+    start_time = time.time()
+    if action == "send_email_summary":
+        output = send_email(user_input, session_state=session_state)
+    else:
+        seo_data = fetch_seo_data(EMAIL_ADDRESS.sub(" ", user_input), session_state=session_state, store_result=True)
+        output = format_seo_summary(seo_data)
+        if action == "fetch_and_email" and seo_data and "error" not in seo_data:
+            output += "\n\n" + send_email(user_input, session_state=session_state)
+    elapsed = time.time() - start_time
+    router_stats.record_routed(elapsed)
+    return RouteResult(action, output, elapsed)
+
+
+def get_router_stats() -> dict:
+    return router_stats.as_dict()
@@ -0,0 +1,218 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+JOB_WORKERS = int(os.getenv("SEO_JOB_WORKERS", 16))
+MAX_CONCURRENT_LLM_CALLS = int(os.getenv("SEO_MAX_CONCURRENT_LLM_CALLS", 8))
+JOB_RETENTION = float(os.getenv("SEO_JOB_RETENTION", 600))  # Seconds finished jobs stay queryable
+
+FINISHED = ("done", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    """
+    Raised inside a job when it has been cancelled.
+    """
+
+
+class Job:
+    """
+    One unit of background work with its status, progress and result.
+    """
+
+    def __init__(self, key=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.status = "queued"  # queued -> running -> done | failed | cancelled
+        self.progress = ""  # Human readable progress message
+        self.partial = ""  # Answer streamed so far
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._future = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def set_progress(self, text):
+        self.progress = text
+
+    def set_partial(self, text):
+        self.partial = text
+
+    def check_cancelled(self):
+        """
+        Cooperative cancellation point for running jobs.
+        """
+        if self._cancel.is_set():
+            raise JobCancelled(f"Job {self.id} was cancelled")
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "progress": self.progress,
+            "partial": self.partial,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class LLMConcurrencyLimiter(BaseCallbackHandler):
+    """
+    Callback that holds a slot of a process-wide semaphore for the duration
+    of every LLM call, capping concurrent LLM requests across all sessions.
+    """
+
+    raise_error = True
+
+    def __init__(self, slots: threading.BoundedSemaphore, job: Job = None):
+        self.slots = slots
+        self.job = job
+        self._held = set()
+        self._lock = threading.Lock()
+
+    def _acquire(self, run_id):
+        while not self.slots.acquire(timeout=0.5):
+            if self.job is not None:
+                self.job.check_cancelled()
+        with self._lock:
+            self._held.add(run_id)
+
+    def _release(self, run_id):
+        with self._lock:
+            if run_id not in self._held:
+                return
+            self._held.discard(run_id)
+        self.slots.release()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        if self.job is not None:
+            self.job.check_cancelled()
+        self._acquire(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        if self.job is not None:
+            self.job.check_cancelled()
+        self._acquire(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._release(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._release(run_id)
+
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        if self.job is not None:
+            self.job.check_cancelled()
+
+
+class JobManager:
+    """
+    Process-level worker pool for agent turns and other slow calls.
+
+    Jobs are submitted with an optional `key`; submitting a key that already
+    has an unfinished job returns that job instead of duplicating the work.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, max_llm_calls: int = MAX_CONCURRENT_LLM_CALLS,
+                 retention: float = JOB_RETENTION):
+        self.retention = retention
+        self.llm_slots = threading.BoundedSemaphore(max_llm_calls)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="seo-job")
+        self._jobs = {}
+        self._active_keys = {}
+        self._lock = threading.Lock()
+
+    def submit(self, func, key=None) -> Job:
+        """
+        Runs `func(job)` in the pool and returns the job immediately.
+        """
+        with self._lock:
+            self._prune()
+            if key is not None and key in self._active_keys:
+                existing = self._jobs.get(self._active_keys[key])
+                if existing is not None and not existing.finished:
+                    return existing
+            job = Job(key)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._active_keys[key] = job.id
+            job._future = self._executor.submit(self._run, job, func)
+        return job
+
+    def _run(self, job, func):
+        if job.cancel_requested:
+            self._finish(job, "cancelled")
+            return
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = func(job)
+            self._finish(job, "done")
+        except JobCancelled:
+            self._finish(job, "cancelled")
+        except Exception as e:
+            logging.error(f"Job {job.id} failed: {e}")
+            job.error = str(e)
+            self._finish(job, "failed")
+
+    def _finish(self, job, status):
+        job.finished_at = time.time()
+        job.status = status
+        with self._lock:
+            if job.key is not None and self._active_keys.get(job.key) == job.id:
+                del self._active_keys[job.key]
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id) -> bool:
+        """
+        Cancels a queued job, or asks a running one to stop at its next LLM or tool call.
+        """
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return False
+        job._cancel.set()
+        if job._future is not None and job._future.cancel():
+            self._finish(job, "cancelled")
+        return True
+
+    def llm_limiter(self, job: Job = None) -> LLMConcurrencyLimiter:
+        """
+        Returns a callback handler that caps concurrent LLM calls for this process.
+        """
+        return LLMConcurrencyLimiter(self.llm_slots, job)
+
+    def stats(self) -> dict:
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {status: statuses.count(status) for status in ("queued", "running", *FINISHED)}
+
+
+# Process-wide job manager shared by all sessions
+job_manager = JobManager()
@@ -0,0 +1,210 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+LLM_CACHE_ENABLED = os.getenv("SEO_LLM_CACHE", "true").lower() != "false"
+LLM_CACHE_DB = os.getenv("SEO_LLM_CACHE_DB", "llm_cache.db")
+LLM_CACHE_TTL = float(os.getenv("SEO_LLM_CACHE_TTL", 7 * 24 * 3600))  # Seconds a response may be replayed
+LLM_CACHE_MAX_ITEMS = int(os.getenv("SEO_LLM_CACHE_MAX_ITEMS", 5000))
+# Sampled (temperature > 0) responses are only replayed when this is enabled
+LLM_CACHE_ANY_TEMPERATURE = os.getenv("SEO_LLM_CACHE_ANY_TEMPERATURE", "false").lower() == "true"
+
+# Models LangChain cannot serialize are described by the repr of their sorted parameters
+TEMPERATURE_PATTERN = re.compile(r"'temperature', ([0-9.]+)")
+MODEL_PATTERN = re.compile(r"'model(?:_name)?', '([^']+)'")
+
+
+def parse_llm_string(llm_string: str) -> dict:
+    """
+    Returns the temperature and model name described by LangChain's
+    `llm_string`, None where they cannot be found.
+
+    For serializable models such as ChatOpenAI the part before "---" is the
+    model serialized as JSON (its parameters under "kwargs"); the part after
+    it holds the call options such as stop words.
+    """
+    head = llm_string.split("---", 1)[0]
+    try:
+        serialized = json.loads(head)
+    except ValueError:
+        serialized = None
+    if isinstance(serialized, dict):
+        kwargs = serialized.get("kwargs") or {}
+        temperature = kwargs.get("temperature")
+        model = kwargs.get("model_name") or kwargs.get("model")
+        return {
+            "temperature": float(temperature) if isinstance(temperature, (int, float)) else None,
+            "model": model if isinstance(model, str) else None,
+        }
+    temperature = TEMPERATURE_PATTERN.search(head)
+    model = MODEL_PATTERN.search(head)
+    return {
+        "temperature": float(temperature.group(1)) if temperature else None,
+        "model": model.group(1) if model else None,
+    }
+
+
+class LLMCache(BaseCache):
+    """
+    Exact-match LangChain cache of LLM responses in SQLite.
+
+    Entries are keyed on a hash of the model parameters LangChain passes as
+    `llm_string` (model, temperature, ...) and the full prompt, which includes
+    the tool results of the current ReAct step, so a different observation
+    never replays an old answer. Unless `any_temperature` is set, calls whose
+    temperature is above 0 or unknown are not cached. Entries expire after
+    `ttl` seconds and the least recently used ones are evicted beyond
+    `max_items`.
+
+    The latency saved by a hit is the time the original call took, measured
+    from the cache miss to the response being stored.
+    """
+
+    def __init__(self, db_path: str = LLM_CACHE_DB, ttl: float = LLM_CACHE_TTL,
+                 max_items: int = LLM_CACHE_MAX_ITEMS, any_temperature: bool = LLM_CACHE_ANY_TEMPERATURE):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_items = max_items
+        self.any_temperature = any_temperature
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self._lock = threading.Lock()
+        self._misses = OrderedDict()  # key -> time of the miss, until the response is stored
+        self.stats = {"lookups": 0, "hits": 0, "misses": 0, "bypassed": 0, "stored": 0, "evictions": 0,
+                      "saved_seconds": 0.0}
+        with self._lock:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY,"
+                " model TEXT,"
+                " temperature REAL,"
+                " response TEXT NOT NULL,"
+                " latency REAL NOT NULL,"
+                " stored_at REAL NOT NULL,"
+                " used_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_used ON llm_cache (used_at)")
+            self._db.commit()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode()).hexdigest()
+
+    def _bypassed(self, llm_string: str) -> bool:
+        if self.any_temperature:
+            return False
+        # An unknown temperature may be the model's sampling default
+        temperature = parse_llm_string(llm_string)["temperature"]
+        return temperature is None or temperature > 0
+
+    def _count(self, name: str, amount=1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def lookup(self, prompt: str, llm_string: str):
+        if self._bypassed(llm_string):
+            self._count("bypassed")
+            return None
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            self.stats["lookups"] += 1
+            row = self._db.execute(
+                "SELECT response, latency FROM llm_cache WHERE key = ? AND stored_at >= ?", (key, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                self._misses[key] = now
+                while len(self._misses) > 1000:  # Calls that failed never call update()
+                    self._misses.popitem(last=False)
+                return None
+            self._db.execute("UPDATE llm_cache SET used_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        try:
+            generations = [loads(generation) for generation in loads(row[0])]
+        except Exception as e:
+            logging.warning(f"Discarding unreadable LLM cache entry: {e}")
+            with self._lock:
+                self.stats["misses"] += 1
+                self._misses[key] = now
+            return None
+        with self._lock:
+            self.stats["hits"] += 1
+            self.stats["saved_seconds"] += row[1]
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val):
+        if self._bypassed(llm_string):
+            return
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        params = parse_llm_string(llm_string)
+        response = dumps([dumps(generation) for generation in return_val])
+        with self._lock:
+            missed_at = self._misses.pop(key, now)
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, temperature, response, latency, stored_at, used_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, params["model"], params["temperature"], response, now - missed_at, now, now),
+            )
+            self.stats["stored"] += 1
+            self._evict(now)
+            self._db.commit()
+
+    def _evict(self, now: float):
+        # Caller holds self._lock
+        expired = self._db.execute("DELETE FROM llm_cache WHERE stored_at < ?", (now - self.ttl,)).rowcount
+        count = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        overflow = count - self.max_items
+        if overflow > 0:
+            self._db.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY used_at LIMIT ?)",
+                (overflow,),
+            )
+        self.stats["evictions"] += expired + max(overflow, 0)
+
+    def clear(self, **kwargs):
+        with self._lock:
+            self._db.execute("DELETE FROM llm_cache")
+            self._db.commit()
+            self._misses.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        lookups = stats["lookups"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["saved_seconds"] = round(stats["saved_seconds"], 3)
+        return stats
+
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """
+    Returns the process-wide LLM cache, or None when SEO_LLM_CACHE=false.
+    """
+    global _llm_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _llm_cache is None:
+        with _llm_cache_lock:
+            if _llm_cache is None:
+                _llm_cache = LLMCache()
+    return _llm_cache
+
+
+def get_llm_cache_stats() -> dict:
+    cache = get_llm_cache()
+    return cache.get_stats() if cache is not None else {"enabled": False}
@@ -1,16 +1,21 @@
+import os
 import re
 import smtplib
-import os
 import logging
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv
 
+from email_digest import digest_batcher
+from email_queue import build_message, get_sender_credentials, mail_queue, open_smtp_connection
 from fetch_seo_data import fetch_seo_data
+from session_workspace import get_workspace
+from tracing import span
 
 # Load environment variables
 load_dotenv()
 
+# When enabled, reports are grouped per recipient into periodic digest emails
+EMAIL_DIGEST = os.getenv("SEO_EMAIL_DIGEST", "false").lower() == "true"
+
 # Configure logging
 #logging.basicConfig(level=logging.INFO, filename='email_log.txt', filemode='a', format='%(asctime)s - %(message)s')
 
@@ -64,30 +69,6 @@ def extract_recipient_email(user_input, session_state):
     return recipient_email
 
 
-def extract_website_url_from_chat(session_state):
-    """
-    Extracts the website URL from the chat history.
-    """
-    for msg in reversed(session_state.get("chat_history", [])):
-        if "http" in msg["content"]:  # Find the first message with a URL
-            return extract_domain_from_input(msg["content"])
-    return None
-
-
-def fetch_and_validate_seo_data(website_url, session_state):
-    """
-    Fetches SEO data for the website URL and validates it.
-    """
-    if "last_seo_data" not in session_state or session_state["last_seo_data"].get("domain") != website_url:
-        logging.info(f"Fetching SEO data for URL: {website_url}")
-        session_state["last_seo_data"] = fetch_seo_data(website_url)
-
-    seo_data = session_state["last_seo_data"]
-    if not seo_data or "error" in seo_data:
-        return None, f"Failed to fetch valid SEO data: {seo_data.get('error', 'Unknown error')}"
-    return seo_data, None
-
-
 def generate_email_content(seo_data):
     """
     Generates the email subject and body using the SEO data.
@@ -110,44 +91,69 @@ def generate_email_content(seo_data):
 
 def send_smtp_email(subject, body, recipient_email):
     """
-    Sends the email using SMTP.
+    Sends the email synchronously over a dedicated SMTP connection.
     """
-    sender_email = os.getenv("SENDER_EMAIL")
-    sender_password = os.getenv("SENDER_PASSWORD")
-    if not sender_email or not sender_password:
-        raise ValueError("Sender email or password not set in environment variables.")
+    sender_email, sender_password = get_sender_credentials()
 
-    with smtplib.SMTP('smtp.gmail.com', 587) as server:
-        server.starttls()
-        server.login(sender_email, sender_password)
-
-        msg = MIMEMultipart()
-        msg['From'] = sender_email
-        msg['To'] = recipient_email
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
-        server.sendmail(sender_email, recipient_email, msg.as_string())
+    with span("smtp_connect", queued=False):
+        server = open_smtp_connection(sender_email, sender_password)
+    with server:
+        msg = build_message(sender_email, recipient_email, subject, body)
+        with span("smtp_send", queued=False):
+            server.sendmail(sender_email, recipient_email, msg.as_string())
         logging.info(f"Email sent to {recipient_email}")
 
 
-def fetch_and_validate_seo_data(website_url, session_state):
+def queue_email(subject, body, recipient_email):
     """
-    Fetches SEO data for the website URL and validates it.
+    Hands the email to the background delivery queue and returns its ticket.
     """
-    logging.debug(f"Fetching SEO data for: {website_url}")
-    if "last_seo_data" not in session_state or session_state["last_seo_data"] is None:
-        session_state["last_seo_data"] = fetch_seo_data(website_url)
-        logging.debug(f"Fetched SEO data: {session_state['last_seo_data']}")
+    return mail_queue.submit(subject, body, recipient_email)
 
-    seo_data = session_state.get("last_seo_data")
-    if not seo_data:
-        logging.error("SEO data is None.")
-        return None, "Failed to fetch SEO data: No data returned."
 
+def add_to_digest(seo_data, recipient_email):
+    """
+    Adds the report to the recipient's pending digest and returns how many domains it holds.
+    """
+    return digest_batcher.add(recipient_email, seo_data)
+
+
+def flush_digests():
+    """
+    Sends every pending digest now and returns the flush throughput.
+    """
+    return digest_batcher.flush()
+
+
+def get_delivery_status(ticket_id):
+    """
+    Returns the delivery status of a queued email, or None for an unknown ticket.
+    """
+    ticket = mail_queue.get_ticket(ticket_id)
+    return ticket.as_dict() if ticket else None
+
+
+def resolve_seo_data(user_input, session_state):
+    """
+    Returns the SEO data to email: the record of a domain named in the input
+    when it was already analyzed in the session, otherwise the last analyzed
+    one. A domain not analyzed yet is fetched once and registered.
+    """
+    workspace = get_workspace(session_state)
+    seo_data = workspace.find(user_input)
+    if seo_data is None:
+        mentioned = workspace.mentioned(user_input)
+        if mentioned:
+            logging.info(f"Fetching SEO data for: {mentioned[0]}")
+            seo_data = fetch_seo_data(mentioned[0], session_state=session_state, store_result=True)
+        else:
+            seo_data = workspace.latest()
+
+    if not seo_data:
+        return None, "No analyzed website found in this session to email. Please analyze a website first."
     if "error" in seo_data:
         logging.error(f"SEO data contains error: {seo_data.get('error')}")
         return None, f"Failed to fetch valid SEO data: {seo_data.get('error', 'Unknown error')}"
-
     return seo_data, None
 
 
@@ -158,30 +164,29 @@ def send_email(user_input, session_state,):
     try:
         # Extract recipient email
         recipient_email = extract_recipient_email(user_input, session_state)
-        print(f"Recipient email: {recipient_email}")
+        logging.debug(f"Recipient email: {recipient_email}")
         if not recipient_email:
             return "No valid email addresses found in the input text or chat history."
 
-        # Extract website URL
-        website_url = extract_website_url_from_chat(session_state)
-        print(f"Website URL: {website_url}")
-        if not website_url:
-            return "No website URL found in chat history to fetch SEO data."
-
-        # Fetch and validate SEO data
-        seo_data, error = fetch_and_validate_seo_data(website_url, session_state)
+        # Look up the SEO data in the session workspace
+        seo_data, error = resolve_seo_data(user_input, session_state)
         if error:
             return error
 
-        print(f"Validated SEO data: {seo_data}")
+        logging.debug(f"Validated SEO data: {seo_data}")
+
+        if EMAIL_DIGEST:
+            count = add_to_digest(seo_data, recipient_email)
+            return (f"Report for {seo_data.get('domain')} added to the digest for "
+                    f"{recipient_email} ({count} domain{'s' if count != 1 else ''} pending)")
 
         # Generate email content
         subject, body = generate_email_content(seo_data)
 
-        # Send the email
-        send_smtp_email(subject, body, recipient_email)
+        # Queue the email; delivery happens in the background
+        ticket = queue_email(subject, body, recipient_email)
 
-        return f"Email successfully sent to {recipient_email}"
+        return f"Email queued for delivery to {recipient_email} (ticket {ticket.id})"
 
     except smtplib.SMTPException as e:
         logging.error(f"SMTP error occurred: {e}")
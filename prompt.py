@@ -18,6 +18,8 @@ You operate in a loop of **thought-reflect-action**, structured as follows:
      * fetch_seo_data: Analyze and search a website by extracting the domain and fetching its SEO data.
        Always provide only the URL when calling the `fetch_seo_data` tool.
      * send_email_summary: Draft and send a summary email after user confirmation.
+     * compare_seo_data: Compare websites side by side. Provide the domains to compare;
+       websites already analyzed in the conversation are not fetched again.
 
 3. **Reflect**: Evaluate the result of the action.
    - Analyze the action's output to determine its relevance to the query.
@@ -0,0 +1,230 @@
+import heapq
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+try:
+    import fcntl
+except ImportError:  # Windows: the quota file is then only consistent within one process
+    fcntl = None
+
+RATE_PER_SECOND = float(os.getenv("RAPIDAPI_RATE_PER_SECOND", 5))
+BURST = float(os.getenv("RAPIDAPI_BURST", 5))
+MONTHLY_QUOTA = int(os.getenv("RAPIDAPI_MONTHLY_QUOTA", 0))  # 0 means unknown until the API reports it
+QUOTA_FILE = os.getenv("RAPIDAPI_QUOTA_FILE", "rapidapi_quota.json")
+
+# Request priorities, lower values are served first
+INTERACTIVE = 0
+BATCH = 1
+
+
+class QuotaExceededError(requests.exceptions.RequestException):
+    """
+    Raised when the monthly API quota is used up until its reset time.
+    """
+
+
+class QuotaTracker:
+    """
+    Tracks the remaining monthly quota from RapidAPI's x-ratelimit-requests-*
+    headers and persists it to a JSON file so it survives restarts and is
+    shared between processes.
+
+    Every update re-reads the file and writes it back while holding an
+    exclusive lock on `<path>.lock`, so concurrent processes (API workers,
+    bulk runs, the UI) add to the same counters instead of overwriting them.
+    """
+
+    def __init__(self, path: str = QUOTA_FILE, monthly_quota: int = MONTHLY_QUOTA):
+        self.path = path
+        self._lock = threading.Lock()
+        self.state = {"limit": monthly_quota or None, "remaining": None, "reset_at": None, "used": 0}
+        with self._locked():
+            self._load()
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            if not self.path or fcntl is None:
+                yield
+                return
+            with open(f"{self.path}.lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as file:
+                self.state.update(json.load(file))
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not read quota file {self.path}: {e}")
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as file:
+                json.dump(self.state, file)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Could not write quota file {self.path}: {e}")
+
+    def _roll_period(self):
+        reset_at = self.state.get("reset_at")
+        if reset_at and time.time() >= reset_at:
+            self.state.update(remaining=self.state.get("limit"), reset_at=None, used=0)
+
+    def check(self):
+        """
+        Raises QuotaExceededError if no requests are left in the current period.
+        """
+        with self._locked():
+            self._load()
+            self._roll_period()
+            if self.state.get("remaining") is not None and self.state["remaining"] <= 0:
+                reset_at = self.state.get("reset_at")
+                when = time.strftime("%Y-%m-%d %H:%M", time.localtime(reset_at)) if reset_at else "the next period"
+                raise QuotaExceededError(f"RapidAPI monthly quota exhausted until {when}")
+
+    def record_request(self):
+        with self._locked():
+            self._load()
+            self._roll_period()
+            self.state["used"] += 1
+            if self.state.get("remaining") is not None:
+                self.state["remaining"] -= 1
+            self._save()
+
+    def observe(self, headers):
+        """
+        Updates the quota from response headers, which are authoritative.
+        """
+        limit = headers.get("x-ratelimit-requests-limit")
+        remaining = headers.get("x-ratelimit-requests-remaining")
+        reset = headers.get("x-ratelimit-requests-reset")
+        if limit is None and remaining is None:
+            return
+        with self._locked():
+            self._load()
+            try:
+                if limit is not None:
+                    self.state["limit"] = int(limit)
+                if remaining is not None:
+                    self.state["remaining"] = int(remaining)
+                if reset is not None:
+                    self.state["reset_at"] = time.time() + int(reset)
+            except ValueError:
+                logging.warning(f"Ignoring malformed quota headers: {limit}, {remaining}, {reset}")
+            self._save()
+
+    def as_dict(self) -> dict:
+        with self._locked():
+            self._load()
+            return dict(self.state)
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every thread in the process.
+
+    Callers that exceed the rate wait in a priority queue instead of failing:
+    interactive requests are always granted before queued batch requests, and
+    requests of equal priority are served in arrival order.
+    """
+
+    def __init__(self, rate: float = RATE_PER_SECOND, burst: float = BURST, quota: QuotaTracker = None):
+        self.rate = rate
+        self.burst = burst
+        self.quota = quota
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._waiters = []  # heap of (priority, sequence)
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self.granted = 0
+        self.waited_seconds = 0.0
+        self.throttled = 0
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority: int = INTERACTIVE) -> float:
+        """
+        Blocks until a request may be sent and returns how long it waited.
+        """
+        if self.quota is not None:
+            self.quota.check()
+        start_time = time.monotonic()
+        with self._cond:
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiters[0] == ticket and self._tokens >= 1 and now >= self._blocked_until:
+                        break
+                    if self._waiters[0] != ticket:
+                        self._cond.wait()
+                        continue
+                    wait = max((1 - self._tokens) / self.rate, self._blocked_until - now, 0.001)
+                    self._cond.wait(wait)
+                self._tokens -= 1
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+            waited = time.monotonic() - start_time
+            self.granted += 1
+            self.waited_seconds += waited
+        if self.quota is not None:
+            self.quota.record_request()
+        return waited
+
+    def observe(self, response):
+        """
+        Feeds a response back: updates the quota and backs off after a 429.
+        """
+        if self.quota is not None:
+            self.quota.observe(response.headers)
+        if response.status_code == 429:
+            retry_after = response.headers.get("Retry-After")
+            try:
+                pause = float(retry_after) if retry_after is not None else 1.0
+            except ValueError:
+                pause = 1.0
+            with self._cond:
+                self.throttled += 1
+                self._tokens = 0
+                self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            stats = {
+                "granted": self.granted,
+                "queued": len(self._waiters),
+                "throttled": self.throttled,
+                "waited_seconds": round(self.waited_seconds, 3),
+            }
+        if self.quota is not None:
+            stats["quota"] = self.quota.as_dict()
+        return stats
+
+
+# Process-wide limiter for the RapidAPI key
+rapidapi_limiter = RateLimiter(quota=QuotaTracker())
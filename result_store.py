@@ -0,0 +1,214 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+RESULT_DB_PATH = os.getenv("SEO_RESULT_DB", "seo_results.db")
+
+
+class ResultStore:
+    """
+    SQLite store of SEO snapshots, indexed by domain and fetch time.
+
+    It also holds the state API workers share: archived chat messages, the
+    domains analyzed in each chat session and the status of queued emails.
+    Writes are queued and performed by a background thread so they stay off
+    the request path; reads go straight to the database.
+    """
+
+    def __init__(self, db_path: str = RESULT_DB_PATH):
+        self.db_path = db_path
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self._lock = threading.Lock()  # Serializes use of the connection
+        self._writer_lock = threading.Lock()  # Guards starting the writer, never held during I/O
+        self._queue = queue.Queue()
+        self._writer = None
+        self._create_tables()
+
+    def _create_tables(self):
+        with self._lock:
+            self._db.executescript(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " domain TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL,"
+                " data TEXT NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS snapshots_domain_time ON snapshots (domain, fetched_at DESC);"
+                "CREATE TABLE IF NOT EXISTS chat_archive ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " session_id TEXT NOT NULL,"
+                " archived_at REAL NOT NULL,"
+                " role TEXT NOT NULL,"
+                " content TEXT NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS chat_archive_session ON chat_archive (session_id, id);"
+                "CREATE TABLE IF NOT EXISTS session_workspaces ("
+                " session_id TEXT PRIMARY KEY,"
+                " updated_at REAL NOT NULL,"
+                " entries TEXT NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS email_tickets ("
+                " id TEXT PRIMARY KEY,"
+                " updated_at REAL NOT NULL,"
+                " data TEXT NOT NULL);"
+            )
+            self._db.commit()
+
+    def _ensure_writer(self):
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._write_loop, name="result-store-writer", daemon=True)
+            self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            sql, params = self._queue.get()
+            try:
+                with self._lock:
+                    self._db.execute(sql, params)
+                    # Commit once the queue is drained to batch bursts of writes
+                    if self._queue.empty():
+                        self._db.commit()
+            except sqlite3.Error as e:
+                logging.error(f"Result store write failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def enqueue(self, sql: str, params: tuple):
+        """
+        Queues a write statement for the background writer. It never waits on
+        the database, even while the writer is committing.
+        """
+        with self._writer_lock:
+            self._ensure_writer()
+        self._queue.put((sql, params))
+
+    def save(self, seo_data: dict, fetched_at: float = None):
+        """
+        Queues a snapshot for writing and returns immediately.
+        """
+        fetched_at = fetched_at or time.time()
+        self.enqueue(
+            "INSERT INTO snapshots (domain, fetched_at, data) VALUES (?, ?, ?)",
+            (seo_data.get("domain", "Unknown domain"), fetched_at, json.dumps(seo_data)),
+        )
+        return fetched_at
+
+    def archive_messages(self, session_id: str, messages: list):
+        """
+        Queues chat messages dropped from a session's history for archiving.
+        """
+        archived_at = time.time()
+        for msg in messages:
+            content = msg["content"] if isinstance(msg["content"], str) else json.dumps(msg["content"], default=str)
+            self.enqueue(
+                "INSERT INTO chat_archive (session_id, archived_at, role, content) VALUES (?, ?, ?, ?)",
+                (session_id, archived_at, msg["role"], content),
+            )
+
+    def archived_messages(self, session_id: str, limit: int = 50, before_id: int = None) -> list:
+        """
+        Returns archived messages of a session, newest first.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, role, content, archived_at FROM chat_archive"
+                " WHERE session_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                (session_id, before_id or 2 ** 63 - 1, limit),
+            ).fetchall()
+        return [{"id": row[0], "role": row[1], "content": row[2], "archived_at": row[3]} for row in rows]
+
+    def save_workspace(self, session_id: str, entries: list):
+        """
+        Queues the [domain, turn] pairs of a session's workspace, oldest first, replacing older ones.
+        """
+        self.enqueue(
+            "INSERT OR REPLACE INTO session_workspaces (session_id, updated_at, entries) VALUES (?, ?, ?)",
+            (session_id, time.time(), json.dumps(entries)),
+        )
+
+    def workspace_entries(self, session_id: str) -> list:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT entries FROM session_workspaces WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def save_ticket(self, ticket: dict):
+        """
+        Queues the current status of an email delivery ticket.
+        """
+        self.enqueue(
+            "INSERT OR REPLACE INTO email_tickets (id, updated_at, data) VALUES (?, ?, ?)",
+            (ticket["id"], time.time(), json.dumps(ticket, default=str)),
+        )
+
+    def ticket(self, ticket_id: str):
+        """
+        Returns the last saved status of a delivery ticket, or None.
+        """
+        with self._lock:
+            row = self._db.execute("SELECT data FROM email_tickets WHERE id = ?", (ticket_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def flush(self):
+        """
+        Blocks until every queued write has been committed.
+        """
+        self._queue.join()
+
+    def _rows(self, sql: str, params: tuple) -> list:
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [{"id": row[0], "domain": row[1], "fetched_at": row[2], "data": json.loads(row[3])} for row in rows]
+
+    def latest(self, domain: str):
+        """
+        Returns the most recent snapshot of a domain, or None.
+        """
+        rows = self._rows(
+            "SELECT id, domain, fetched_at, data FROM snapshots WHERE domain = ? ORDER BY fetched_at DESC LIMIT 1",
+            (domain,),
+        )
+        return rows[0] if rows else None
+
+    def history(self, domain: str, limit: int = 20, since: float = None, until: float = None) -> list:
+        """
+        Returns the snapshots of a domain, newest first, optionally within a time range.
+        """
+        return self._rows(
+            "SELECT id, domain, fetched_at, data FROM snapshots"
+            " WHERE domain = ? AND fetched_at >= ? AND fetched_at <= ?"
+            " ORDER BY fetched_at DESC LIMIT ?",
+            (domain, since or 0, until or float("inf"), limit),
+        )
+
+    def get(self, snapshot_id: int):
+        rows = self._rows("SELECT id, domain, fetched_at, data FROM snapshots WHERE id = ?", (snapshot_id,))
+        return rows[0] if rows else None
+
+    def domains(self) -> list:
+        """
+        Returns every stored domain with its snapshot count and last fetch time.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT domain, COUNT(*), MAX(fetched_at) FROM snapshots GROUP BY domain ORDER BY domain"
+            ).fetchall()
+        return [{"domain": row[0], "snapshots": row[1], "last_fetched_at": row[2]} for row in rows]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_result_store() -> ResultStore:
+    """
+    Returns the process-wide result store, opening it on first use.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ResultStore()
+    return _store
@@ -0,0 +1,233 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_TTL = float(os.getenv("SEO_CACHE_TTL", 24 * 3600))  # Seconds a lookup stays fresh
+CACHE_STALE_TTL = float(os.getenv("SEO_CACHE_STALE_TTL", 6 * 3600))  # Extra seconds a stale lookup may be served
+CACHE_MAX_ITEMS = int(os.getenv("SEO_CACHE_MAX_ITEMS", 512))  # Entries kept in the in-memory tier
+CACHE_DB_PATH = os.getenv("SEO_CACHE_DB", "seo_cache.db")  # On-disk tier, empty string disables it
+
+
+class CacheStats:
+    """
+    Thread-safe hit/miss/eviction counters for a cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.memory_hits = 0
+            self.disk_hits = 0
+            self.stale_hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.refreshes = 0
+            self.saved_seconds = 0.0
+
+    def incr(self, name: str, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "refreshes": self.refreshes,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                # Every hit is one upstream call (and one unit of API quota) avoided
+                "saved_requests": hits,
+                "saved_seconds": round(self.saved_seconds, 3),
+            }
+
+
+class TTLCache:
+    """
+    Two-tier cache: an in-memory LRU in front of an SQLite table.
+
+    Entries are fresh for `ttl` seconds. For `stale_ttl` seconds after that they
+    are still served, while a background refresh replaces them
+    (stale-while-revalidate). Older entries are treated as misses.
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL, stale_ttl: float = CACHE_STALE_TTL,
+                 max_items: int = CACHE_MAX_ITEMS, db_path: str = CACHE_DB_PATH):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_items = max_items
+        self.db_path = db_path
+        self.stats = CacheStats()
+        self._memory = OrderedDict()  # key -> (value, stored_at, cost)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._db = None
+        if db_path:
+            self._init_db()
+
+    def _init_db(self):
+        try:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, cost REAL NOT NULL)"
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            logging.warning(f"Disk cache disabled, could not open {self.db_path}: {e}")
+            self._db = None
+
+    def _remember(self, key, value, stored_at, cost):
+        """Insert into the memory tier, evicting the least recently used entries."""
+        with self._lock:
+            self._memory[key] = (value, stored_at, cost)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+                self.stats.incr("evictions")
+
+    def _read_disk(self, key):
+        if self._db is None:
+            return None
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT value, stored_at, cost FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logging.warning(f"Disk cache read failed: {e}")
+            return None
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], row[2]
+
+    def _write_disk(self, key, value, stored_at, cost):
+        if self._db is None:
+            return
+        try:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, stored_at, cost) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), stored_at, cost),
+                )
+                self._db.commit()
+        except sqlite3.Error as e:
+            logging.warning(f"Disk cache write failed: {e}")
+
+    def _lookup(self, key):
+        """Returns (value, stored_at, cost, tier) or None."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return (*entry, "memory")
+        entry = self._read_disk(key)
+        if entry is not None:
+            self._remember(key, *entry)
+            return (*entry, "disk")
+        return None
+
+    def get(self, key):
+        """
+        Returns the cached value if it is fresh or still within the stale window.
+        """
+        entry = self._lookup(key)
+        if entry is None:
+            return None
+        value, stored_at, _, _ = entry
+        if time.time() - stored_at > self.ttl + self.stale_ttl:
+            return None
+        return value
+
+    def set(self, key, value, cost: float = 0.0):
+        """
+        Stores a value. `cost` is the number of seconds it took to produce and is
+        credited to `saved_seconds` every time the value is served from cache.
+        """
+        stored_at = time.time()
+        self._remember(key, value, stored_at, cost)
+        self._write_disk(key, value, stored_at, cost)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._memory.pop(key, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._db.commit()
+
+    def purge_expired(self) -> int:
+        """
+        Removes entries past their stale window from the disk tier.
+        """
+        if self._db is None:
+            return 0
+        cutoff = time.time() - self.ttl - self.stale_ttl
+        with self._lock:
+            removed = self._db.execute("DELETE FROM cache WHERE stored_at < ?", (cutoff,)).rowcount
+            self._db.commit()
+        self.stats.incr("evictions", removed)
+        return removed
+
+    def get_or_fetch(self, key, loader):
+        """
+        Returns (value, cached) for `key`, calling `loader()` on a miss.
+
+        `loader` must return a (value, cost_in_seconds) tuple.
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            value, stored_at, cost, tier = entry
+            age = time.time() - stored_at
+            if age <= self.ttl + self.stale_ttl:
+                self.stats.incr("memory_hits" if tier == "memory" else "disk_hits")
+                self.stats.incr("saved_seconds", cost)
+                if age > self.ttl:
+                    self.stats.incr("stale_hits")
+                    self._refresh_in_background(key, loader)
+                return value, True
+
+        self.stats.incr("misses")
+        value, cost = loader()
+        self.set(key, value, cost)
+        return value, False
+
+    def _refresh_in_background(self, key, loader):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                value, cost = loader()
+                self.set(key, value, cost)
+                self.stats.incr("refreshes")
+            except Exception as e:
+                logging.warning(f"Background refresh failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f"cache-refresh-{key}", daemon=True).start()
+
+
+# Process-wide cache for SimilarWeb lookups
+seo_cache = TTLCache()
+
+
+def get_cache_stats() -> dict:
+    """
+    Returns the hit/miss/eviction counters of the SimilarWeb lookup cache.
+    """
+    return seo_cache.stats.as_dict()
@@ -0,0 +1,184 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the standard library is the fallback
+    orjson = None
+
+
+def _default(obj):
+    # orjson does not serialize float subclasses such as http_client.ResponseTime
+    if isinstance(obj, float):
+        return float(obj)
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj) -> str:
+    """
+    Serializes to compact JSON, with orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default).decode()
+    return json.dumps(obj, default=_default, separators=(",", ":"))
+
+
+def loads(text):
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+
+class SimilarSite:
+    """
+    A competitor listed in SimilarSites.
+    """
+
+    __slots__ = ("domain", "title", "description", "visits", "top_country")
+
+    def __init__(self, domain, title, description, visits, top_country):
+        self.domain = domain
+        self.title = title
+        self.description = description
+        self.visits = visits
+        self.top_country = top_country
+
+    @classmethod
+    def from_api(cls, site: dict):
+        return cls(
+            site.get("Domain", "Unknown domain"),
+            site.get("Title", "No title"),
+            site.get("Description", "No description"),
+            site.get("Visits", 0),
+            (site.get("TopCountry") or {}).get("CountryName", "Unknown country"),
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            data.get("domain", "Unknown domain"),
+            data.get("title", "No title"),
+            data.get("description", "No description"),
+            data.get("visits", 0),
+            data.get("top_country", "Unknown country"),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "domain": self.domain,
+            "title": self.title,
+            "description": self.description,
+            "visits": self.visits,
+            "top_country": self.top_country,
+        }
+
+
+class SiteImages:
+    """
+    Screenshot and favicon URLs of a site.
+    """
+
+    __slots__ = ("favicon", "desktop", "smartphone")
+
+    def __init__(self, favicon, desktop, smartphone):
+        self.favicon = favicon
+        self.desktop = desktop
+        self.smartphone = smartphone
+
+    @classmethod
+    def from_api(cls, images: dict):
+        return cls(
+            images.get("Favicon", "No favicon"),
+            images.get("Desktop", "No desktop image"),
+            images.get("Smartphone", "No smartphone image"),
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(data["favicon"], data["desktop"], data["smartphone"])
+
+    def to_dict(self) -> dict:
+        return {"favicon": self.favicon, "desktop": self.desktop, "smartphone": self.smartphone}
+
+
+class SiteRecord:
+    """
+    SEO record of a domain.
+
+    Every part is parsed when the record is built, so a record keeps no
+    reference to the response it came from. Images are only parsed on
+    request. `to_dict()` returns the same shape as fetch_seo_data's dicts.
+    """
+
+    __slots__ = ("domain", "title", "description", "category", "visits", "tags", "response_time",
+                 "similar_sites", "images")
+
+    def __init__(self, domain, title, description, category, visits, tags, response_time=0.0,
+                 similar_sites=None, images=None):
+        self.domain = domain
+        self.title = title
+        self.description = description
+        self.category = category
+        self.visits = visits
+        self.tags = tags
+        self.response_time = response_time
+        self.similar_sites = similar_sites if similar_sites is not None else []
+        self.images = images
+
+    @classmethod
+    def from_api(cls, site_data: dict, response_time: float = 0.0, include_images: bool = False):
+        """
+        Builds a record from a raw SimilarWeb response.
+        """
+        return cls(
+            site_data.get("Domain", "Unknown domain"),
+            site_data.get("Title", "No title found"),
+            site_data.get("Description", "No description found"),
+            site_data.get("Category", "No category found"),
+            site_data.get("Visits", 0),
+            site_data.get("Tags", []),
+            response_time,
+            similar_sites=[SimilarSite.from_api(site) for site in site_data.get("SimilarSites", [])],
+            images=SiteImages.from_api(site_data.get("Images") or {}) if include_images else None,
+        )
+
+    def to_dict(self, include_images: bool = False) -> dict:
+        data = {
+            "domain": self.domain,
+            "title": self.title,
+            "description": self.description,
+            "category": self.category,
+            "visits": self.visits,
+            "tags": self.tags,
+            "similar_sites": [site.to_dict() for site in self.similar_sites],
+            "response_time": self.response_time,
+        }
+        if include_images and self.images is not None:
+            data["images"] = self.images.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        images = data.get("images")
+        return cls(
+            data.get("domain", "Unknown domain"),
+            data.get("title", "No title found"),
+            data.get("description", "No description found"),
+            data.get("category", "No category found"),
+            data.get("visits", 0),
+            data.get("tags", []),
+            data.get("response_time", 0.0),
+            similar_sites=[SimilarSite.from_dict(site) for site in data.get("similar_sites", [])],
+            images=SiteImages.from_dict(images) if images else None,
+        )
+
+    def to_json(self, **extra) -> str:
+        """
+        Serializes the record, plus any `extra` top-level fields, to compact JSON.
+        """
+        data = self.to_dict()
+        data.update(extra)
+        return dumps(data)
+
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(loads(text))
@@ -1,5 +1,9 @@
+import uuid
+
 import streamlit as st
 
+from chat_view import CHAT_PAGE_SIZE
+
 
 def get_session_state():
     """
@@ -12,9 +16,16 @@ def get_session_state():
         'chat_history': [],  # Stores the history of user and agent interactions
         'user_input': " ",   # Stores the latest user input
         'agent': None,       # Holds the LLM agent instance
-        'last_seo_data': None  # Stores the most recent SEO data
+        'last_seo_data': None,  # Stores the most recent SEO data
+        'last_seo_report': None,  # Plain-text report of the most recent SEO data
+        'workspace': None,  # Every SEO record fetched in the session, by domain
+        'active_job': None,  # ID of the background job running the current turn
+        'session_id': None,  # Stable identifier used to archive old chat messages
+        'chat_visible': CHAT_PAGE_SIZE  # Number of chat messages currently displayed
     }
     for key, value in default_state.items():
         if key not in st.session_state:
             st.session_state[key] = value
+    if st.session_state['session_id'] is None:
+        st.session_state['session_id'] = uuid.uuid4().hex
     return st.session_state
@@ -0,0 +1,185 @@
+import json
+import os
+import re
+
+from fetch_seo_data import compact_seo_data, fetch_seo_data, format_seo_report, normalize_domain
+from seo_models import SiteRecord
+
+DOMAIN_PATTERN = re.compile(r"https?://[a-zA-Z0-9./-]+|[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+EMAIL_ADDRESS = re.compile(r"\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b")
+WORKSPACE_MAX_DOMAINS = int(os.getenv("SEO_WORKSPACE_MAX_DOMAINS", 50))  # Records kept per session
+
+
+class SessionWorkspace:
+    """
+    Every SEO record fetched in a session, keyed by normalized domain.
+    Records are held as slotted SiteRecords and handed out as dicts.
+
+    `turns` maps a chat turn (the number of messages exchanged so far,
+    archived ones included) to the domains fetched during it, and
+    `last_domain` is the most recently fetched one. Reports are formatted on
+    first download and kept. At most `max_domains` records are kept; the
+    least recently fetched one is evicted first, with its report and turns.
+    """
+
+    def __init__(self, max_domains: int = WORKSPACE_MAX_DOMAINS):
+        self.max_domains = max_domains
+        self.records = {}
+        self.reports = {}
+        self.turns = {}
+        self.last_domain = None
+
+    def __contains__(self, domain) -> bool:
+        return normalize_domain(domain) in self.records
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def add(self, seo_data: dict, turn: int = None, report: str = None) -> str:
+        """
+        Registers a fetched record, replacing any older record of the same domain.
+        """
+        domain = normalize_domain(seo_data.get("domain", ""))
+        self.records.pop(domain, None)  # Keep `records` ordered by last fetch
+        self.records[domain] = SiteRecord.from_dict(seo_data)
+        if report is not None:
+            self.reports[domain] = report
+        else:
+            self.reports.pop(domain, None)
+        if turn is not None and domain not in self.turns.setdefault(turn, []):
+            self.turns[turn].append(domain)
+        self.last_domain = domain
+        while len(self.records) > max(self.max_domains, 1):
+            self._evict(next(iter(self.records)))
+        return domain
+
+    def _evict(self, domain: str):
+        del self.records[domain]
+        self.reports.pop(domain, None)
+        for turn in [turn for turn, domains in self.turns.items() if domain in domains]:
+            self.turns[turn].remove(domain)
+            if not self.turns[turn]:
+                del self.turns[turn]
+
+    def _as_dict(self, domain):
+        record = self.records.get(domain)
+        return record.to_dict() if record is not None else None
+
+    def get(self, domain: str):
+        return self._as_dict(normalize_domain(domain))
+
+    def latest(self):
+        return self._as_dict(self.last_domain) if self.last_domain else None
+
+    def domains_at(self, turn: int) -> list:
+        return self.turns.get(turn, [])
+
+    def domains(self) -> list:
+        """
+        Returns the analyzed domains, most recent first.
+        """
+        return list(reversed(self.records))
+
+    def entries(self) -> list:
+        """
+        Returns [domain, turn] pairs, oldest first, with the last turn each
+        domain was fetched in (None when unknown).
+        """
+        turns = {}
+        for turn, domains in sorted(self.turns.items()):
+            for domain in domains:
+                turns[domain] = turn
+        return [[domain, turns.get(domain)] for domain in self.records]
+
+    def mentioned(self, text: str) -> list:
+        """
+        Returns the normalized domains mentioned in `text`, ignoring email addresses.
+        """
+        candidates = DOMAIN_PATTERN.findall(EMAIL_ADDRESS.sub(" ", text or ""))
+        return list(dict.fromkeys(normalize_domain(candidate) for candidate in candidates))
+
+    def find(self, text: str):
+        """
+        Returns the record of the first domain mentioned in `text` that was
+        already analyzed, or None.
+        """
+        for domain in self.mentioned(text):
+            if domain in self.records:
+                return self._as_dict(domain)
+        return None
+
+    def report(self, domain: str = None):
+        """
+        Returns the plain-text report of `domain` (default: the last one), or None.
+        """
+        domain = normalize_domain(domain) if domain else self.last_domain
+        if domain not in self.records:
+            return None
+        if domain not in self.reports:
+            self.reports[domain] = format_seo_report(self._as_dict(domain))
+        return self.reports[domain]
+
+    def clear(self):
+        self.records.clear()
+        self.reports.clear()
+        self.turns.clear()
+        self.last_domain = None
+
+
+def get_workspace(session_state) -> SessionWorkspace:
+    """
+    Returns the session's workspace, creating it on first use.
+    """
+    workspace = session_state.get("workspace")
+    if workspace is None:
+        workspace = session_state["workspace"] = SessionWorkspace()
+    return workspace
+
+
+def current_turn(session_state) -> int:
+    return session_state.get("archived_messages", 0) + len(session_state.get("chat_history") or [])
+
+
+def get_or_fetch(domain: str, session_state):
+    """
+    Returns the session's record of `domain`, fetching it only when it has not been analyzed yet.
+    """
+    seo_data = get_workspace(session_state).get(domain)
+    if seo_data is None:
+        seo_data = fetch_seo_data(domain, session_state=session_state, store_result=True)
+    return seo_data
+
+
+def compare_seo_data(user_input: str, session_state) -> str:
+    """
+    Compares the domains mentioned in `user_input` (or the mentioned domain
+    and the last analyzed one) side by side, as compact JSON for the agent.
+    """
+    workspace = get_workspace(session_state)
+    domains = workspace.mentioned(user_input)
+    if len(domains) < 2 and workspace.last_domain and workspace.last_domain not in domains:
+        domains.append(workspace.last_domain)
+    if len(domains) < 2:
+        return "Please name at least two domains to compare."
+
+    records, errors = [], {}
+    for domain in domains:
+        seo_data = get_or_fetch(domain, session_state)
+        if not seo_data or "error" in seo_data:
+            errors[domain] = (seo_data or {}).get("error", "No data found")
+        else:
+            records.append(seo_data)
+
+    similar = [{site["domain"] for site in seo_data.get("similar_sites", [])} for seo_data in records]
+    comparison = {
+        "sites": [
+            {key: value for key, value in compact_seo_data(seo_data).items() if key not in ("t", "desc", "sim")}
+            for seo_data in sorted(records, key=lambda seo_data: seo_data.get("visits") or 0, reverse=True)
+        ],
+        "shared_sim": sorted(set.intersection(*similar)) if len(similar) > 1 else [],
+        "shared_tags": sorted(set.intersection(*(set(seo_data.get("tags", [])) for seo_data in records)))
+        if len(records) > 1 else [],
+    }
+    if errors:
+        comparison["errors"] = errors
+    return json.dumps(comparison, separators=(",", ":"), ensure_ascii=False)
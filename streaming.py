@@ -0,0 +1,181 @@
+import logging
+import re
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Start of the final answer in the conversational agent's JSON output
+FINAL_ANSWER_START = re.compile(r'"action"\s*:\s*"Final Answer"\s*,\s*"action_input"\s*:\s*"')
+
+# Status messages shown while a tool runs
+TOOL_STATUS = {
+    "fetch_seo_data": "Fetching SEO data for {input}…",
+    "send_email_summary": "Preparing the email summary…",
+}
+
+ESCAPES = {"n": "\n", "t": "\t", '"': '"', "\\": "\\", "/": "/"}
+
+
+class FinalAnswerExtractor:
+    """
+    Incrementally extracts the "action_input" text of a Final Answer from
+    streamed JSON tokens, so only the answer is shown to the user.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._buffer = ""
+        self._state = "seek"  # seek -> emit -> done
+        self._escape = False
+        self._unicode = None  # Hex digits of a \uXXXX escape being read
+        self._high_surrogate = None
+
+    def feed(self, token: str) -> str:
+        """
+        Consumes a token and returns the answer text it contains, if any.
+        """
+        if self._state == "done":
+            return ""
+        if self._state == "seek":
+            self._buffer += token
+            match = FINAL_ANSWER_START.search(self._buffer)
+            if not match:
+                return ""
+            self._state = "emit"
+            token = self._buffer[match.end():]
+            self._buffer = ""
+
+        visible = []
+        for char in token:
+            if self._unicode is not None:
+                self._unicode += char
+                if len(self._unicode) == 4:
+                    visible.append(self._decode_unicode(self._unicode))
+                    self._unicode = None
+            elif self._escape:
+                self._escape = False
+                if char == "u":
+                    self._unicode = ""
+                else:
+                    visible.append(ESCAPES.get(char, char))
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._state = "done"
+                break
+            else:
+                visible.append(char)
+        return "".join(visible)
+
+    def _decode_unicode(self, digits: str) -> str:
+        try:
+            code = int(digits, 16)
+        except ValueError:
+            return "\\u" + digits
+        # Characters outside the BMP arrive as a \uD8xx\uDCxx surrogate pair
+        if 0xD800 <= code < 0xDC00:
+            self._high_surrogate = code
+            return ""
+        if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+            code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self._high_surrogate = None
+        return chr(code)
+
+
+class LatencyStats:
+    """
+    Aggregates time-to-first-token and total latency of agent turns.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.ttft_seconds = 0.0
+        self.total_seconds = 0.0
+
+    def record(self, ttft, total):
+        with self._lock:
+            self.turns += 1
+            self.ttft_seconds += ttft if ttft is not None else total
+            self.total_seconds += total
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "turns": self.turns,
+                "avg_time_to_first_token": self.ttft_seconds / self.turns if self.turns else 0.0,
+                "avg_total_latency": self.total_seconds / self.turns if self.turns else 0.0,
+            }
+
+
+latency_stats = LatencyStats()
+
+
+class StreamingAnswerHandler(BaseCallbackHandler):
+    """
+    Streams tool status and final-answer tokens to UI callbacks while the
+    agent runs, and times the turn.
+
+    `on_status(text)` receives progress messages and `on_answer(text)` the
+    answer streamed so far; both default to doing nothing.
+    """
+
+    def __init__(self, on_status=None, on_answer=None):
+        self.on_status = on_status or (lambda text: None)
+        self.on_answer = on_answer or (lambda text: None)
+        self.extractor = FinalAnswerExtractor()
+        self.answer = ""
+        self.started_at = time.time()
+        self.first_token_at = None
+        self.finished_at = None
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        # Each step of the ReAct loop is a separate LLM call
+        self.extractor.reset()
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self.extractor.reset()
+
+    def _shown(self):
+        # Time to first token is measured to the first text the user sees,
+        # not to the hidden tool-selection JSON
+        if self.first_token_at is None:
+            self.first_token_at = time.time()
+
+    def on_llm_new_token(self, token: str, **kwargs):
+        text = self.extractor.feed(token)
+        if text:
+            self._shown()
+            self.answer += text
+            self.on_answer(self.answer)
+
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        name = (serialized or {}).get("name", "tool")
+        template = TOOL_STATUS.get(name, "Running {name}…")
+        self._shown()
+        self.on_status(template.format(name=name, input=input_str))
+
+    def on_tool_end(self, output, **kwargs):
+        self._shown()
+        self.on_status("Thinking…")
+
+    @property
+    def time_to_first_token(self):
+        return self.first_token_at - self.started_at if self.first_token_at else None
+
+    def finish(self):
+        """
+        Marks the turn as finished, records and returns its timings.
+        """
+        self.finished_at = time.time()
+        total = self.finished_at - self.started_at
+        latency_stats.record(self.time_to_first_token, total)
+        ttft = self.time_to_first_token
+        logging.info(
+            f"Agent turn: time to first token {ttft:.2f}s, total {total:.2f}s" if ttft is not None
+            else f"Agent turn: no streamed tokens, total {total:.2f}s"
+        )
+        return {"time_to_first_token": ttft, "total": total}
@@ -0,0 +1,15 @@
+import os
+import sys
+import tempfile
+
+# Modules read their configuration at import time: keep every store they open
+# out of the working tree before any of them is imported
+_scratch = tempfile.mkdtemp(prefix="seo-tests-")
+os.environ.setdefault("SEO_CACHE_DB", "")
+os.environ.setdefault("SEO_RESULT_DB", os.path.join(_scratch, "seo_results.db"))
+os.environ.setdefault("SEO_LLM_CACHE_DB", os.path.join(_scratch, "llm_cache.db"))
+os.environ.setdefault("RAPIDAPI_QUOTA_FILE", os.path.join(_scratch, "rapidapi_quota.json"))
+os.environ.setdefault("SEO_API_SESSION_LOCK_FILE", os.path.join(_scratch, "seo_api_sessions.lock"))
+os.environ.setdefault("RAPIDAPI_KEY", "test-key")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,28 @@
+import tracemalloc
+
+import agent_manager
+from benchmark import make_scripted_chat_model
+
+
+def test_shared_agent_is_cached_per_model():
+    first, second = make_scripted_chat_model(0), make_scripted_chat_model(0)
+
+    agent = agent_manager.get_shared_agent("test-key", llm=first)
+
+    assert agent_manager.get_shared_agent("test-key", llm=first) is agent
+    other = agent_manager.get_shared_agent("test-key", llm=second)
+    assert other is not agent
+    assert other.llm_chain.llm is second
+
+
+def _fail_tracing(*args):
+    raise AssertionError("tracemalloc started")
+
+
+def test_create_agent_does_not_trace_memory_by_default(monkeypatch):
+    monkeypatch.setattr(tracemalloc, "start", _fail_tracing)
+
+    executor = agent_manager.create_agent("test-key", llm=make_scripted_chat_model(0))
+
+    assert executor.memory is not None
+    assert agent_manager.get_session_stats()["avg_memory_bytes"] is None
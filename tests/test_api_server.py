@@ -0,0 +1,107 @@
+import multiprocessing
+import os
+
+import pytest
+
+import api_server
+import fetch_seo_data
+import manage_email
+from api_server import ApiError, SEOService, SessionLocks, share_rate_limit
+from email_queue import DeliveryTicket
+from result_store import get_result_store
+
+
+@pytest.fixture
+def workers(monkeypatch):
+    # Two services stand in for two forked workers sharing the result store
+    monkeypatch.setattr(fetch_seo_data, "analyze_domain",
+                        lambda domain, priority=None: {"domain": domain, "title": "Title", "visits": 10,
+                                                       "similar_sites": [], "tags": []})
+    monkeypatch.setattr(manage_email, "queue_email",
+                        lambda subject, body, recipient: DeliveryTicket(recipient, subject, body))
+    return SEOService(), SEOService()
+
+
+def test_session_workspace_follows_the_session_across_workers(workers):
+    first, second = workers
+    first.analyze({"domain": "shared-session.example", "session_id": "session-a"})
+
+    ticket = second.email({"recipient": "me@example.com", "session_id": "session-a"})
+
+    assert "shared-session.example" in ticket["subject"]
+
+
+def test_ticket_status_is_visible_on_other_workers(workers, monkeypatch):
+    first, second = workers
+    ticket = DeliveryTicket("me@example.com", "subject", "body")
+    manage_email.mail_queue._notify(ticket)
+    ticket.status = "sent"
+    manage_email.mail_queue._notify(ticket)
+    get_result_store().flush()
+    monkeypatch.setattr(manage_email, "get_delivery_status", lambda ticket_id: None)  # Not queued by this worker
+
+    assert second.email_status(ticket.id)["status"] == "sent"
+    with pytest.raises(ApiError) as error:
+        second.email_status("unknown")
+    assert error.value.status == 404
+
+
+def test_batch_rejects_invalid_workers(workers):
+    with pytest.raises(ApiError) as error:
+        workers[0].batch({"domains": ["a.example"], "workers": "many"})
+    assert error.value.status == 400
+
+
+def test_rate_and_burst_are_split_between_workers(monkeypatch):
+    monkeypatch.setenv("RAPIDAPI_RATE_PER_SECOND", "6")
+    monkeypatch.setenv("RAPIDAPI_BURST", "10")
+
+    share_rate_limit(4)
+
+    assert float(os.environ["RAPIDAPI_RATE_PER_SECOND"]) == 1.5
+    assert float(os.environ["RAPIDAPI_BURST"]) == 2.5
+    monkeypatch.setenv("RAPIDAPI_BURST", "2")
+    share_rate_limit(4)
+    assert float(os.environ["RAPIDAPI_BURST"]) == 1.0
+
+
+def _hold_session_lock(path, session_id, locked, release):
+    locks = SessionLocks(path)
+    locks.acquire(session_id, timeout=1)
+    locked.set()
+    release.wait(5)
+    locks.release(session_id)
+
+
+def test_session_is_locked_across_processes(tmp_path):
+    path = str(tmp_path / "sessions.lock")
+    context = multiprocessing.get_context("fork")
+    locked, release = context.Event(), context.Event()
+    holder = context.Process(target=_hold_session_lock, args=(path, "session-a", locked, release))
+    holder.start()
+    try:
+        assert locked.wait(5)
+        locks = SessionLocks(path)
+
+        assert locks.acquire("session-a", timeout=0.1) is False
+        assert locks.acquire("session-b", timeout=0.1) is True
+        locks.release("session-b")
+        release.set()
+        assert locks.acquire("session-a", timeout=5) is True
+        locks.release("session-a")
+    finally:
+        release.set()
+        holder.join(5)
+
+
+def test_chat_answers_409_while_another_worker_runs_a_turn(workers, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(api_server, "API_TURN_WAIT", 0.1)
+    first = workers[0]
+    monkeypatch.setattr(first.session_locks, "acquire", lambda session_id, timeout: False)
+
+    with pytest.raises(ApiError) as error:
+        first.chat({"message": "hello", "session_id": "busy-session"})
+
+    assert error.value.status == 409
+    assert first._session("busy-session").lock.acquire(timeout=0)  # The worker's own lock was released
@@ -0,0 +1,35 @@
+import io
+import json
+
+import requests
+
+import bulk_analysis
+from seo_models import SiteRecord
+
+
+def _fake_record(domain, priority=None):
+    if domain.startswith("down."):
+        raise requests.exceptions.ConnectionError("connection refused")
+    return SiteRecord.from_dict({"domain": domain, "visits": 10})
+
+
+def test_results_report_the_input_as_given(monkeypatch):
+    monkeypatch.setattr(bulk_analysis, "analyze_domain_record", _fake_record)
+
+    results = list(bulk_analysis.analyze_domains(["https://www.Example.com/pricing", "example.com", "down.example"]))
+
+    by_input = {result["input"]: result for result in results}
+    assert set(by_input) == {"https://www.Example.com/pricing", "down.example"}
+    assert by_input["https://www.Example.com/pricing"]["record"].domain == "example.com"
+    assert "Failed to fetch data from API" in by_input["down.example"]["error"]
+
+
+def test_run_batch_writes_one_line_per_domain(monkeypatch):
+    monkeypatch.setattr(bulk_analysis, "analyze_domain_record", _fake_record)
+    output = io.StringIO()
+
+    summary = bulk_analysis.run_batch(["a.example", "down.example"], output, max_workers=2)
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert {line["domain"] for line in lines} == {"a.example", "down.example"}
+    assert summary["succeeded"] == 1 and summary["failed"] == 1
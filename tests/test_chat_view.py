@@ -0,0 +1,62 @@
+from chat_view import render_history, render_message, trim_history
+
+
+def test_rendered_html_is_cached_on_the_message():
+    msg = {"role": "user", "content": "hello"}
+
+    first = render_message(msg)
+    msg["html"] = "<p>cached</p>"
+
+    assert "hello" in first
+    assert render_message(msg) == "<p>cached</p>"
+
+
+def test_cache_is_invalidated_when_the_content_is_replaced():
+    msg = {"role": "AI agent", "content": "Fetching data..."}
+    render_message(msg)
+
+    msg["content"] = "Done: <b>example.com</b>"
+
+    assert "Done: &lt;b&gt;example.com&lt;/b&gt;" in render_message(msg)
+    assert "Fetching" not in msg["html"]
+
+
+def test_cache_is_invalidated_when_structured_content_is_edited_in_place():
+    msg = {"role": "AI agent", "content": {"domain": "example.com", "visits": 10}}
+    render_message(msg)
+
+    msg["content"]["visits"] = 99
+
+    assert "99" in render_message(msg)
+
+
+def test_cache_is_invalidated_when_the_role_changes():
+    msg = {"role": "user", "content": "hi"}
+    render_message(msg)
+
+    msg["role"] = "AI agent"
+
+    assert "AI Agent:" in render_message(msg)
+
+
+def test_history_renders_newest_first_and_reflects_edits():
+    history = [{"role": "user", "content": "first"}, {"role": "AI agent", "content": "second"}]
+    render_history(history, 2)
+    history[0]["content"] = "edited"
+
+    page = render_history(history, 2)
+
+    assert page.index("second") < page.index("edited")
+    assert "first" not in page
+    assert "first" not in render_history(history, 1) and "edited" not in render_history(history, 1)
+
+
+def test_trim_history_archives_without_cached_html():
+    archived = []
+    state = {"chat_history": [{"role": "user", "content": str(i)} for i in range(5)]}
+    render_history(state["chat_history"], 5)
+
+    assert trim_history(state, limit=3, archive=archived.extend) == 2
+    assert archived == [{"role": "user", "content": "0"}, {"role": "user", "content": "1"}]
+    assert [msg["content"] for msg in state["chat_history"]] == ["2", "3", "4"]
+    assert state["archived_messages"] == 2
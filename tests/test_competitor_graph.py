@@ -0,0 +1,49 @@
+import competitor_graph
+from competitor_graph import crawl
+from seo_models import SiteRecord
+
+
+def _fake_record(domain, priority=None):
+    # Every site lists two competitors one level further down
+    similar = [{"domain": f"{index}.{domain}", "title": "", "description": "", "visits": index, "top_country": ""}
+               for index in (1, 2)]
+    return SiteRecord.from_dict({"domain": domain, "visits": 100, "similar_sites": similar})
+
+
+def _record_fetches(monkeypatch):
+    fetched = []
+    monkeypatch.setattr(competitor_graph, "analyze_domain_record",
+                        lambda domain, priority=None: fetched.append(domain) or _fake_record(domain))
+    return fetched
+
+
+def test_depth_covers_hops_without_fetching_the_last_one(monkeypatch):
+    fetched = _record_fetches(monkeypatch)
+
+    graph = crawl(["a.com"], depth=2, max_workers=2)
+
+    assert sorted(fetched) == ["1.a.com", "2.a.com", "a.com"]
+    assert max(node["hops"] for node in graph.nodes.values()) == 2
+    assert len(graph.nodes) == 7
+
+
+def test_extending_a_graph_fetches_its_unfetched_nodes(monkeypatch):
+    fetched = _record_fetches(monkeypatch)
+    graph = crawl(["a.com"], depth=1, max_workers=2)
+    assert fetched == ["a.com"]
+
+    fetched.clear()
+    crawl(["a.com"], depth=2, max_workers=2, graph=graph)
+
+    assert sorted(fetched) == ["1.a.com", "2.a.com"]
+    assert graph.nodes["1.1.a.com"]["hops"] == 2
+
+
+def test_extending_with_a_new_seed(monkeypatch):
+    fetched = _record_fetches(monkeypatch)
+    graph = crawl(["a.com"], depth=1, max_workers=2)
+
+    crawl(["b.com"], depth=1, max_workers=2, graph=graph)
+
+    assert fetched == ["a.com", "b.com"]
+    assert graph.seeds == ["a.com", "b.com"]
@@ -0,0 +1,46 @@
+from langchain_community.chat_models import ChatOpenAI
+from langchain_core.agents import AgentAction
+
+import conversation_memory
+from conversation_memory import TokenBudgetMemory, count_tokens, create_memory
+
+
+def _real_model():
+    # The agent's model class; counting its tokens needs tiktoken, which may not be installed
+    return ChatOpenAI(temperature=0, openai_api_key="sk-test", model="gpt-4o-mini")
+
+
+def test_save_context_with_the_real_model_class():
+    memory = create_memory(_real_model(), token_budget=10000)
+
+    memory.save_context({"input": "analyze example.com"}, {"output": "example.com has 1000 visits"})
+
+    messages = memory.load_memory_variables({})["chat_history"]
+    assert [message.content for message in messages] == ["analyze example.com", "example.com has 1000 visits"]
+    assert count_tokens(memory.llm, messages) > 0
+
+
+def test_prune_summarizes_beyond_the_budget(monkeypatch):
+    monkeypatch.setattr(TokenBudgetMemory, "predict_new_summary",
+                        lambda self, messages, summary: f"{len(messages)} messages summarized")
+    memory = create_memory(_real_model(), token_budget=40)
+
+    for turn in range(5):
+        memory.save_context({"input": f"question {turn} " * 10}, {"output": f"answer {turn} " * 10})
+
+    assert memory.moving_summary_buffer.endswith("messages summarized")
+    assert count_tokens(memory.llm, memory.chat_memory.messages) <= 40
+
+
+def test_tool_results_are_stored_as_compact_references():
+    memory = create_memory(_real_model(), token_budget=10000)
+    record = '{"d":"example.com","desc":"' + "x" * 2000 + '"}'
+    steps = [(AgentAction("fetch_seo_data", "example.com", ""), record)]
+
+    memory.save_context({"input": "analyze example.com"}, {"output": "Done.", "intermediate_steps": steps})
+
+    stored = memory.chat_memory.messages[-1].content
+    assert stored.startswith("[fetch_seo_data(example.com) -> {")
+    assert "truncated, full result in the session" in stored
+    assert stored.endswith("Done.")
+    assert len(stored) < conversation_memory.MAX_STORED_OBSERVATION_CHARS + 200
@@ -0,0 +1,33 @@
+import smtplib
+
+import email_digest
+
+
+def test_digest_is_not_requeued_after_a_permanent_failure(monkeypatch):
+    monkeypatch.setattr(email_digest, "get_sender_credentials", lambda: ("me@example.com", "secret"))
+
+    def reject_login(*args):
+        raise smtplib.SMTPAuthenticationError(535, b"bad credentials")
+
+    monkeypatch.setattr(email_digest, "open_smtp_connection", reject_login)
+    batcher = email_digest.DigestBatcher(interval=0)
+    batcher.add("a@example.com", {"domain": "example.com"})
+
+    result = batcher.flush()
+    assert result["failed"] == 1 and result["dropped"] == 1
+    assert batcher.pending() == {}
+
+
+def test_digest_is_requeued_after_a_transient_failure(monkeypatch):
+    monkeypatch.setattr(email_digest, "get_sender_credentials", lambda: ("me@example.com", "secret"))
+
+    def refuse_connection(*args):
+        raise ConnectionRefusedError()
+
+    monkeypatch.setattr(email_digest, "open_smtp_connection", refuse_connection)
+    batcher = email_digest.DigestBatcher(interval=0)
+    batcher.add("a@example.com", {"domain": "example.com"})
+
+    result = batcher.flush()
+    assert result["failed"] == 1 and result["dropped"] == 0
+    assert batcher.pending() == {"a@example.com": 1}
@@ -0,0 +1,25 @@
+import smtplib
+import socket
+
+import pytest
+
+from email_queue import is_transient_error
+
+
+@pytest.mark.parametrize("error, transient", [
+    (smtplib.SMTPAuthenticationError(535, b"bad credentials"), False),
+    (smtplib.SMTPNotSupportedError("STARTTLS not supported"), False),
+    (smtplib.SMTPRecipientsRefused({"a@example.com": (550, b"no such user")}), False),
+    (smtplib.SMTPRecipientsRefused({"a@example.com": (451, b"try later")}), True),
+    (smtplib.SMTPDataError(554, b"rejected"), False),
+    (smtplib.SMTPDataError(421, b"busy"), True),
+    (smtplib.SMTPSenderRefused(553, b"sender refused", "me@example.com"), False),
+    (smtplib.SMTPException("unknown"), False),
+    (smtplib.SMTPServerDisconnected("gone"), True),
+    (smtplib.SMTPConnectError(554, b"no service"), True),
+    (socket.timeout("timed out"), True),
+    (ConnectionResetError(), True),
+    (ValueError("Sender email or password not set"), False),
+])
+def test_is_transient_error(error, transient):
+    assert is_transient_error(error) is transient
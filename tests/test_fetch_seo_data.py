@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+import fetch_seo_data
+from tracing import tracer
+
+
+def test_missing_rapidapi_key_fails_before_any_request(monkeypatch):
+    monkeypatch.delenv("RAPIDAPI_KEY", raising=False)
+    monkeypatch.setattr(fetch_seo_data, "get_json", lambda *args, **kwargs: pytest.fail("request sent"))
+    with pytest.raises(ValueError, match="RAPIDAPI_KEY"):
+        fetch_seo_data.request_similar_sites("example.com")
+
+
+def test_missing_rapidapi_key_is_reported_to_the_session(monkeypatch):
+    monkeypatch.delenv("RAPIDAPI_KEY", raising=False)
+    state = {}
+    result = fetch_seo_data.fetch_seo_data("analyze missing-key.example", session_state=state)
+    assert "RAPIDAPI_KEY" in result["error"]
+    assert state["last_seo_data"] is None
+
+
+def test_rapidapi_request_span_excludes_rate_limit_wait(monkeypatch):
+    def slow_acquire(priority):
+        time.sleep(0.2)
+        return 0.2
+
+    def fake_get_json(url, before_request=None, **kwargs):
+        before_request()
+        return {}, None
+
+    monkeypatch.setattr(fetch_seo_data.rapidapi_limiter, "acquire", slow_acquire)
+    monkeypatch.setattr(fetch_seo_data, "get_json", fake_get_json)
+    tracer.reset()
+
+    fetch_seo_data.request_similar_sites("example.com")
+
+    summary = tracer.summary()
+    assert summary["rate_limit_wait"]["max"] >= 0.2
+    assert summary["rapidapi_request"]["max"] < 0.1
+
+
+def _run_concurrently(flight, func, callers=10):
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(flight.do("example.com", func))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results, errors
+
+
+def _leader(flight, outcome, callers=10):
+    # Holds the upstream call open until every other caller has joined it
+    def func():
+        deadline = time.time() + 5
+        while flight.stats()["coalesced"] < callers - 1 and time.time() < deadline:
+            time.sleep(0.01)
+        return outcome()
+    return func
+
+
+def test_single_flight_shares_one_upstream_call():
+    flight = fetch_seo_data.SingleFlight()
+    upstream = []
+
+    results, errors = _run_concurrently(flight, _leader(flight, lambda: upstream.append(1) or {"domain": "example.com"}))
+
+    assert errors == [] and len(results) == 10
+    assert all(result is results[0] for result in results)
+    assert upstream == [1]
+    assert flight.stats() == {"calls": 10, "coalesced": 9, "upstream_calls": 1, "in_flight": 0}
+
+
+def test_single_flight_raises_the_leaders_error_in_every_caller():
+    flight = fetch_seo_data.SingleFlight()
+
+    def fail():
+        raise requests.exceptions.ConnectionError("upstream down")
+
+    results, errors = _run_concurrently(flight, _leader(flight, fail))
+
+    assert results == [] and len(errors) == 10
+    assert all(isinstance(error, requests.exceptions.ConnectionError) for error in errors)
+    # A failed call is not cached: the next caller goes upstream again
+    assert flight.do("example.com", lambda: "retried") == "retried"
+    assert flight.stats()["upstream_calls"] == 2
+
+
+SEO_RECORD = {
+    "domain": "example.com",
+    "title": "Example " * 30,
+    "description": "A long description " * 20,
+    "category": "Tech",
+    "visits": 1234,
+    "tags": [f"tag{index}" for index in range(15)],
+    "similar_sites": [
+        {"domain": f"site{index}.com", "title": "Title", "description": "Desc", "visits": index,
+         "top_country": "France"}
+        for index in range(8)
+    ],
+    "response_time": 0.2,
+}
+
+
+def test_compact_seo_data_shortens_keys_and_truncates():
+    compact = fetch_seo_data.compact_seo_data(SEO_RECORD, top_n=3, description_chars=50)
+
+    assert set(compact) == {"d", "t", "desc", "cat", "v", "tags", "sim", "n_sim"}
+    assert compact["d"] == "example.com" and compact["cat"] == "Tech" and compact["v"] == 1234
+    assert len(compact["t"]) == 50 and compact["t"].endswith("…")
+    assert len(compact["desc"]) == 50
+    assert len(compact["tags"]) == 10
+    assert compact["sim"] == [["site0.com", 0, "France"], ["site1.com", 1, "France"], ["site2.com", 2, "France"]]
+    assert compact["n_sim"] == 8
+
+
+def test_compact_seo_data_handles_missing_fields_and_errors():
+    compact = fetch_seo_data.compact_seo_data({"domain": "bare.com", "similar_sites": [{"domain": "other.com"}]})
+
+    assert compact == {"d": "bare.com", "t": "", "desc": "", "cat": None, "v": None, "tags": [],
+                       "sim": [["other.com", None, None]], "n_sim": 1}
+    assert fetch_seo_data.compact_seo_data({"error": "quota"}) == {"error": "quota"}
+    assert fetch_seo_data.compact_seo_data(None) is None
+
+
+def test_compact_tool_output_is_smaller_and_counted():
+    before = fetch_seo_data.get_compaction_stats()["outputs"]
+
+    output = fetch_seo_data.compact_tool_output(SEO_RECORD)
+
+    assert json.loads(output)["d"] == "example.com"
+    assert len(output) < len(json.dumps(SEO_RECORD))
+    assert fetch_seo_data.get_compaction_stats()["outputs"] == before + 1
+    assert fetch_seo_data.compact_tool_output(None) == "No domain found in the input."
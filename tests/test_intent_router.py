@@ -0,0 +1,57 @@
+import pytest
+
+import intent_router
+
+
+def test_compound_request_analyzes_then_emails():
+    assert intent_router.classify("analyze example.com and email it to bob@x.com") == "fetch_and_email"
+    assert intent_router.classify("email it to bob@x.com") == "send_email_summary"
+    assert intent_router.classify("analyze example.com") == "fetch_seo_data"
+
+
+@pytest.mark.parametrize("text, action", [
+    ("example.com", "fetch_seo_data"),
+    ("check https://www.example.com/pricing", "fetch_seo_data"),
+    ("email it to bob@x.com", "send_email_summary"),
+    ("please send the example.com report to bob@x.com", "send_email_summary"),
+    # Negated or descriptive mentions never send anything
+    ("do not email bob@x.com", None),
+    ("don't send it to bob@x.com", None),
+    ("never forward reports to bob@x.com", None),
+    ("check my email bob@x.com", None),
+    ("my email is bob@x.com", None),
+    # Not a request to analyze one website
+    ("seo tips for my blog.io", None),
+    ("check config.yaml", None),
+    ("analyze example.com, google.com", None),
+    ("analyze example.com and email it to bob@x.com and carol@y.com", "fetch_and_email"),
+])
+def test_classify(text, action):
+    assert intent_router.classify(text) == action
+
+
+def test_route_chains_fetch_and_email(monkeypatch):
+    calls = []
+    monkeypatch.setattr(intent_router, "fetch_seo_data",
+                        lambda text, **kwargs: calls.append(("fetch", text.strip())) or {"domain": "example.com"})
+    monkeypatch.setattr(intent_router, "send_email",
+                        lambda text, **kwargs: calls.append(("email", text)) or "Email queued")
+
+    result = intent_router.route("analyze example.com and email it to bob@x.com", {})
+
+    assert [name for name, _ in calls] == ["fetch", "email"]
+    assert "bob@x.com" not in calls[0][1]
+    assert result.output.endswith("Email queued")
+
+
+def test_route_skips_email_when_analysis_fails(monkeypatch):
+    monkeypatch.setattr(intent_router, "fetch_seo_data", lambda text, **kwargs: {"error": "quota exceeded"})
+    monkeypatch.setattr(intent_router, "send_email", lambda text, **kwargs: _fail_email())
+
+    result = intent_router.route("analyze example.com and email it to bob@x.com", {})
+
+    assert "quota exceeded" in result.output
+
+
+def _fail_email():
+    raise AssertionError("email sent after a failed analysis")
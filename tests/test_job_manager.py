@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from job_manager import JobManager
+
+
+def _wait(job, timeout=5):
+    job._future.result(timeout)
+    return job
+
+
+@pytest.fixture
+def manager():
+    return JobManager(workers=1, max_llm_calls=1)
+
+
+def test_job_runs_through_its_statuses(manager):
+    started, release = threading.Event(), threading.Event()
+
+    def work(job):
+        started.set()
+        job.set_progress("working")
+        release.wait(5)
+        return "answer"
+
+    job = manager.submit(work)
+    assert started.wait(5)
+    assert job.status == "running" and job.progress == "working"
+    release.set()
+
+    assert _wait(job).status == "done"
+    assert job.result == "answer" and job.started_at <= job.finished_at
+
+
+def test_failed_job_keeps_its_error(manager):
+    def work(job):
+        raise RuntimeError("upstream down")
+
+    job = _wait(manager.submit(work))
+
+    assert job.status == "failed" and job.error == "upstream down"
+    assert manager.stats()["failed"] == 1
+
+
+def test_same_key_reuses_the_unfinished_job(manager):
+    release = threading.Event()
+    first = manager.submit(lambda job: release.wait(5), key="session-1")
+
+    assert manager.submit(lambda job: None, key="session-1") is first
+    release.set()
+    _wait(first)
+    assert manager.submit(lambda job: None, key="session-1") is not first
+
+
+def test_cancel_queued_and_running_jobs(manager):
+    started = threading.Event()
+
+    def work(job):
+        started.set()
+        while True:
+            job.check_cancelled()
+            time.sleep(0.01)
+
+    running = manager.submit(work)
+    queued = manager.submit(lambda job: "never runs")
+    assert started.wait(5)
+
+    assert manager.cancel(queued.id) and queued.status == "cancelled"
+    assert manager.cancel(running.id)
+    assert _wait(running).status == "cancelled"
+    assert not manager.cancel(running.id)
+
+
+def test_finished_jobs_are_pruned_after_retention():
+    manager = JobManager(workers=1, retention=0)
+    old = _wait(manager.submit(lambda job: None, key="session-1"))
+    time.sleep(0.01)
+
+    manager.submit(lambda job: None)
+
+    assert manager.get(old.id) is None
+    assert "session-1" not in manager._active_keys
@@ -0,0 +1,48 @@
+import pytest
+from langchain_community.chat_models import ChatOpenAI
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+from llm_cache import LLMCache, parse_llm_string
+
+
+def _llm_string(temperature):
+    # Built the same way as the agent's model, so the cache sees the real format
+    llm = ChatOpenAI(temperature=temperature, openai_api_key="sk-test", model="gpt-4o-mini", streaming=True)
+    return llm._get_llm_string(stop=["Observation:"])
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMCache(db_path=str(tmp_path / "llm_cache.db"), ttl=3600, max_items=10)
+
+
+def test_parse_llm_string_reads_the_serialized_model():
+    assert parse_llm_string(_llm_string(0.8)) == {"temperature": 0.8, "model": "gpt-4o-mini"}
+    assert parse_llm_string(_llm_string(0)) == {"temperature": 0.0, "model": "gpt-4o-mini"}
+
+
+def test_parse_llm_string_falls_back_to_the_parameter_repr():
+    params = str(sorted({"model_name": "custom", "temperature": 0.3}.items()))
+    assert parse_llm_string(f"{params}---[('stop', None)]") == {"temperature": 0.3, "model": "custom"}
+    assert parse_llm_string("unknown") == {"temperature": None, "model": None}
+
+
+def test_sampled_responses_are_not_replayed(cache):
+    llm_string = _llm_string(0.8)
+    assert cache.lookup("prompt", llm_string) is None
+    cache.update("prompt", llm_string, [ChatGeneration(message=AIMessage(content="sampled"))])
+
+    assert cache.lookup("prompt", llm_string) is None
+    assert cache.get_stats()["bypassed"] == 2
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_deterministic_responses_are_replayed(cache):
+    llm_string = _llm_string(0)
+    assert cache.lookup("prompt", llm_string) is None
+    cache.update("prompt", llm_string, [ChatGeneration(message=AIMessage(content="cached"))])
+
+    assert cache.lookup("prompt", llm_string)[0].message.content == "cached"
+    row = cache._db.execute("SELECT model, temperature FROM llm_cache").fetchone()
+    assert row == ("gpt-4o-mini", 0.0)
@@ -0,0 +1,43 @@
+import multiprocessing
+import sys
+
+import pytest
+
+from rate_limiter import QuotaExceededError, QuotaTracker
+
+REQUESTS_PER_PROCESS = 50
+
+
+def _record_requests(path):
+    tracker = QuotaTracker(path)
+    for _ in range(REQUESTS_PER_PROCESS):
+        tracker.record_request()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="the quota file lock needs fcntl")
+def test_quota_is_shared_between_processes(tmp_path):
+    path = str(tmp_path / "quota.json")
+    tracker = QuotaTracker(path)
+    tracker.observe({"x-ratelimit-requests-limit": "1000", "x-ratelimit-requests-remaining": "1000"})
+
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=_record_requests, args=(path,)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+
+    # Counts from every process add up, and this tracker sees them without restarting
+    state = tracker.as_dict()
+    assert state["used"] == 4 * REQUESTS_PER_PROCESS
+    assert state["remaining"] == 1000 - 4 * REQUESTS_PER_PROCESS
+
+
+def test_check_sees_quota_exhausted_by_another_tracker(tmp_path):
+    path = str(tmp_path / "quota.json")
+    first, second = QuotaTracker(path), QuotaTracker(path)
+    first.check()
+    second.observe({"x-ratelimit-requests-remaining": "0", "x-ratelimit-requests-reset": "3600"})
+    with pytest.raises(QuotaExceededError):
+        first.check()
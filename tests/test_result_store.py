@@ -0,0 +1,85 @@
+import threading
+
+import fetch_seo_data
+from result_store import ResultStore
+
+
+def _store(tmp_path):
+    return ResultStore(str(tmp_path / "results.db"))
+
+
+def test_queued_snapshots_are_readable_after_flush(tmp_path):
+    store = _store(tmp_path)
+    store.save({"domain": "a.example", "visits": 1}, fetched_at=100.0)
+    store.save({"domain": "a.example", "visits": 2}, fetched_at=200.0)
+    store.save({"domain": "b.example", "visits": 3}, fetched_at=150.0)
+    store.flush()
+
+    assert store.latest("a.example")["data"]["visits"] == 2
+    assert [row["data"]["visits"] for row in store.history("a.example")] == [2, 1]
+    assert [row["fetched_at"] for row in store.history("a.example", since=150.0)] == [200.0]
+    assert store.domains() == [
+        {"domain": "a.example", "snapshots": 2, "last_fetched_at": 200.0},
+        {"domain": "b.example", "snapshots": 1, "last_fetched_at": 150.0},
+    ]
+    assert store.latest("missing.example") is None
+
+
+def test_workspaces_and_tickets_replace_older_versions(tmp_path):
+    store = _store(tmp_path)
+    store.save_workspace("session", [["a.example", 1]])
+    store.save_workspace("session", [["a.example", 1], ["b.example", 2]])
+    store.save_ticket({"id": "t1", "status": "queued"})
+    store.save_ticket({"id": "t1", "status": "sent"})
+    store.flush()
+
+    assert store.workspace_entries("session") == [["a.example", 1], ["b.example", 2]]
+    assert store.workspace_entries("other") == []
+    assert store.ticket("t1")["status"] == "sent"
+    assert store.ticket("t2") is None
+
+
+def test_archived_messages_page_newest_first(tmp_path):
+    store = _store(tmp_path)
+    store.archive_messages("session", [{"role": "user", "content": f"message {i}"} for i in range(5)])
+    store.flush()
+
+    page = store.archived_messages("session", limit=2)
+    older = store.archived_messages("session", limit=10, before_id=page[-1]["id"])
+
+    assert [msg["content"] for msg in page] == ["message 4", "message 3"]
+    assert [msg["content"] for msg in older] == ["message 2", "message 1", "message 0"]
+
+
+def test_save_does_not_wait_for_the_database(tmp_path):
+    store = _store(tmp_path)
+    store.save({"domain": "warm.example"})
+    store.flush()
+    saved = threading.Event()
+
+    # Holding the connection lock stands in for a slow commit by the writer
+    with store._lock:
+        threading.Thread(target=lambda: (store.save({"domain": "queued.example"}), saved.set())).start()
+        assert saved.wait(1)
+    store.flush()
+
+    assert store.latest("queued.example") is not None
+
+
+class _RecordingStore:
+    def __init__(self):
+        self.saved = []
+
+    def save(self, seo_data):
+        self.saved.append(seo_data)
+
+
+def test_save_to_file_is_accepted_as_store_result(monkeypatch):
+    store = _RecordingStore()
+    monkeypatch.setattr(fetch_seo_data, "analyze_domain",
+                        lambda domain, priority=None: {"domain": domain, "similar_sites": [], "tags": []})
+    monkeypatch.setattr(fetch_seo_data, "get_result_store", lambda: store)
+
+    fetch_seo_data.fetch_seo_data("legacy.example", session_state={}, save_to_file=True)
+
+    assert [data["domain"] for data in store.saved] == ["legacy.example"]
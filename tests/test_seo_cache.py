@@ -0,0 +1,81 @@
+import threading
+import time
+
+from seo_cache import TTLCache
+
+
+def make_loader(values, calls):
+    def loader():
+        calls.append(time.time())
+        return values[min(len(calls) - 1, len(values) - 1)], 0.5
+    return loader
+
+
+def test_miss_then_fresh_hit(tmp_path):
+    cache = TTLCache(ttl=60, stale_ttl=60, db_path=str(tmp_path / "cache.db"))
+    calls = []
+    loader = make_loader([{"v": 1}], calls)
+
+    assert cache.get_or_fetch("example.com", loader) == ({"v": 1}, False)
+    assert cache.get_or_fetch("example.com", loader) == ({"v": 1}, True)
+    assert len(calls) == 1
+    stats = cache.stats.as_dict()
+    assert stats["misses"] == 1 and stats["memory_hits"] == 1
+    assert stats["saved_seconds"] == 0.5
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    path = str(tmp_path / "cache.db")
+    TTLCache(ttl=60, stale_ttl=0, db_path=path).set("example.com", {"v": 1}, cost=1.0)
+
+    cache = TTLCache(ttl=60, stale_ttl=0, db_path=path)
+    value, cached = cache.get_or_fetch("example.com", make_loader([{"v": 2}], []))
+    assert (value, cached) == ({"v": 1}, True)
+    assert cache.stats.as_dict()["disk_hits"] == 1
+
+
+def test_stale_value_is_served_while_refreshing(tmp_path):
+    cache = TTLCache(ttl=0.05, stale_ttl=60, db_path=str(tmp_path / "cache.db"))
+    calls = []
+    refreshed = threading.Event()
+    values = [{"v": 1}, {"v": 2}]
+
+    def loader():
+        calls.append(time.time())
+        if len(calls) > 1:
+            refreshed.set()
+        return values[len(calls) - 1], 0.0
+
+    cache.get_or_fetch("example.com", loader)
+    time.sleep(0.1)
+    # Past the TTL but inside the stale window: the old value comes back at once
+    assert cache.get_or_fetch("example.com", loader) == ({"v": 1}, True)
+    assert refreshed.wait(5)
+    for _ in range(50):
+        if cache.get("example.com") == {"v": 2}:
+            break
+        time.sleep(0.01)
+    assert cache.get("example.com") == {"v": 2}
+    stats = cache.stats.as_dict()
+    assert stats["stale_hits"] == 1 and stats["refreshes"] == 1
+
+
+def test_expired_value_is_refetched(tmp_path):
+    cache = TTLCache(ttl=0.02, stale_ttl=0.02, db_path=str(tmp_path / "cache.db"))
+    calls = []
+    loader = make_loader([{"v": 1}, {"v": 2}], calls)
+    cache.get_or_fetch("example.com", loader)
+    time.sleep(0.06)
+    assert cache.get("example.com") is None
+    assert cache.get_or_fetch("example.com", loader) == ({"v": 2}, False)
+    assert len(calls) == 2
+    assert cache.purge_expired() == 0  # The refetch replaced the expired row
+
+
+def test_memory_tier_is_bounded():
+    cache = TTLCache(ttl=60, stale_ttl=0, max_items=2, db_path="")
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    assert cache.get("a") is None
+    assert cache.get("c") == "c"
+    assert cache.stats.as_dict()["evictions"] == 1
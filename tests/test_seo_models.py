@@ -0,0 +1,77 @@
+import gc
+import weakref
+
+from seo_models import SimilarSite, SiteRecord, loads
+
+PAYLOAD = {
+    "Domain": "example.com",
+    "Title": "Example",
+    "Description": "An example site",
+    "Category": "Reference",
+    "Visits": 1200,
+    "Tags": ["examples", "docs"],
+    "SimilarSites": [
+        {"Domain": "a.example", "Title": "A", "Description": "First", "Visits": 300,
+         "TopCountry": {"CountryName": "France"}},
+        {"Domain": "b.example", "Visits": 20, "TopCountry": None},
+    ],
+    "Images": {"Favicon": "favicon.png"},
+}
+
+
+class _Payload(dict):
+    # Plain dicts cannot be weakly referenced
+    pass
+
+
+def test_from_api_matches_the_dict_shape():
+    data = SiteRecord.from_api(PAYLOAD, 0.5).to_dict()
+
+    assert data["domain"] == "example.com"
+    assert data["tags"] == ["examples", "docs"]
+    assert data["response_time"] == 0.5
+    assert data["similar_sites"] == [
+        {"domain": "a.example", "title": "A", "description": "First", "visits": 300, "top_country": "France"},
+        {"domain": "b.example", "title": "No title", "description": "No description", "visits": 20,
+         "top_country": "Unknown country"},
+    ]
+    assert "images" not in data
+
+
+def test_images_are_only_parsed_on_request():
+    record = SiteRecord.from_api(PAYLOAD, include_images=True)
+
+    assert record.to_dict(include_images=True)["images"] == {
+        "favicon": "favicon.png", "desktop": "No desktop image", "smartphone": "No smartphone image",
+    }
+    assert SiteRecord.from_api(PAYLOAD).images is None
+
+
+def test_record_keeps_no_reference_to_the_response():
+    payload = _Payload(PAYLOAD, SimilarSites=[_Payload(site) for site in PAYLOAD["SimilarSites"]])
+    refs = [weakref.ref(payload)] + [weakref.ref(site) for site in payload["SimilarSites"]]
+
+    record = SiteRecord.from_api(payload)
+    del payload
+    gc.collect()
+
+    assert all(ref() is None for ref in refs)
+    assert [site.domain for site in record.similar_sites] == ["a.example", "b.example"]
+    assert not hasattr(record, "__dict__")
+
+
+def test_json_round_trip():
+    record = SiteRecord.from_api(PAYLOAD, 0.25, include_images=True)
+
+    restored = SiteRecord.from_json(record.to_json(elapsed=1.5))
+
+    assert restored.to_dict() == record.to_dict()
+    assert loads(record.to_json(elapsed=1.5))["elapsed"] == 1.5
+
+
+def test_from_dict_fills_missing_fields():
+    record = SiteRecord.from_dict({"domain": "partial.example", "similar_sites": [{"domain": "x.example"}]})
+
+    assert record.visits == 0
+    assert record.similar_sites[0].top_country == "Unknown country"
+    assert isinstance(record.similar_sites[0], SimilarSite)
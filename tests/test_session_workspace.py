@@ -0,0 +1,95 @@
+import json
+
+import session_workspace
+from seo_models import SiteRecord
+from session_workspace import SessionWorkspace, compare_seo_data, get_workspace
+
+
+def _seo_data(domain, visits=100, similar=(), tags=()):
+    return {
+        "domain": domain,
+        "title": domain.title(),
+        "visits": visits,
+        "tags": list(tags),
+        "similar_sites": [{"domain": site, "visits": 1} for site in similar],
+    }
+
+
+def test_records_are_slotted_and_handed_out_as_dicts():
+    workspace = SessionWorkspace()
+    workspace.add(_seo_data("www.Example.com"))
+
+    assert isinstance(workspace.records["example.com"], SiteRecord)
+    assert workspace.get("https://example.com/page")["domain"] == "www.Example.com"
+    assert workspace.latest()["visits"] == 100
+    assert "Domain: www.Example.com" in workspace.report()
+
+
+def test_entries_list_domains_oldest_first_with_their_last_turn():
+    workspace = SessionWorkspace()
+    workspace.add(_seo_data("a.example"), turn=1)
+    workspace.add(_seo_data("b.example"), turn=3)
+    workspace.add(_seo_data("c.example"))
+    workspace.add(_seo_data("a.example"), turn=5)
+
+    assert workspace.entries() == [["b.example", 3], ["c.example", None], ["a.example", 5]]
+    assert workspace.domains() == ["a.example", "c.example", "b.example"]
+
+
+def test_mentioned_ignores_email_addresses():
+    workspace = SessionWorkspace()
+
+    mentioned = workspace.mentioned("Email https://www.shop.example/a and blog.io to bob@mail.example, shop.example")
+
+    assert mentioned == ["shop.example", "blog.io"]
+    assert workspace.mentioned("send it to alice@example.com") == []
+    assert workspace.mentioned(None) == []
+
+
+def test_least_recently_fetched_record_is_evicted():
+    workspace = SessionWorkspace(max_domains=2)
+    workspace.add(_seo_data("a.example"), turn=1, report="report a")
+    workspace.add(_seo_data("b.example"), turn=1)
+    workspace.add(_seo_data("a.example"), turn=2, report="report a")  # Refetched: b is now the oldest
+    workspace.add(_seo_data("c.example"), turn=3)
+
+    assert workspace.domains() == ["c.example", "a.example"]
+    assert workspace.turns == {1: ["a.example"], 2: ["a.example"], 3: ["c.example"]}
+    assert "a.example" in workspace.reports
+    workspace.add(_seo_data("d.example"), turn=4)
+    assert "a.example" not in workspace.reports
+    assert workspace.entries() == [["c.example", 3], ["d.example", 4]]
+
+
+def test_compare_uses_session_records_and_fetches_the_rest(monkeypatch):
+    state = {}
+    get_workspace(state).add(_seo_data("a.example", visits=100, similar=["x.example", "y.example"], tags=["seo"]))
+    fetched = []
+
+    def fake_fetch(domain, session_state, store_result=False):
+        fetched.append(domain)
+        seo_data = _seo_data(domain, visits=900, similar=["y.example"], tags=["seo", "ads"])
+        get_workspace(session_state).add(seo_data)
+        return seo_data
+
+    monkeypatch.setattr(session_workspace, "fetch_seo_data", fake_fetch)
+
+    comparison = json.loads(compare_seo_data("compare a.example with b.example", state))
+
+    assert fetched == ["b.example"]
+    assert [site["d"] for site in comparison["sites"]] == ["b.example", "a.example"]
+    assert comparison["shared_sim"] == ["y.example"]
+    assert comparison["shared_tags"] == ["seo"]
+
+
+def test_compare_falls_back_to_the_last_domain_and_reports_errors(monkeypatch):
+    state = {}
+    get_workspace(state).add(_seo_data("a.example"))
+    monkeypatch.setattr(session_workspace, "fetch_seo_data",
+                        lambda domain, session_state, store_result=False: {"error": "quota exceeded"})
+
+    comparison = json.loads(compare_seo_data("how does b.example compare?", state))
+
+    assert [site["d"] for site in comparison["sites"]] == ["a.example"]
+    assert comparison["errors"] == {"b.example": "quota exceeded"}
+    assert compare_seo_data("compare it", {}) == "Please name at least two domains to compare."
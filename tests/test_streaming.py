@@ -0,0 +1,41 @@
+import json
+
+from streaming import FinalAnswerExtractor, StreamingAnswerHandler
+
+
+def _stream(text, size=3):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_extractor_decodes_unicode_escapes_split_across_tokens():
+    answer = "Café — top site 🚀\nDone"
+    output = json.dumps({"action": "Final Answer", "action_input": answer})  # ASCII-escaped like the model's JSON
+    extractor = FinalAnswerExtractor()
+
+    assert "".join(extractor.feed(token) for token in _stream(output)) == answer
+
+
+def test_first_token_waits_for_visible_output():
+    shown = []
+    handler = StreamingAnswerHandler(on_answer=shown.append)
+    tool_call = json.dumps({"action": "fetch_seo_data", "action_input": "example.com"})
+
+    for token in _stream(tool_call):
+        handler.on_llm_new_token(token)
+    assert handler.first_token_at is None
+
+    handler.on_chat_model_start({}, [])
+    for token in _stream(json.dumps({"action": "Final Answer", "action_input": "Hi"})):
+        handler.on_llm_new_token(token)
+    assert handler.first_token_at is not None
+    assert shown[-1] == "Hi"
+
+
+def test_tool_status_counts_as_first_output():
+    statuses = []
+    handler = StreamingAnswerHandler(on_status=statuses.append)
+
+    handler.on_tool_start({"name": "fetch_seo_data"}, "example.com")
+
+    assert handler.first_token_at is not None
+    assert statuses == ["Fetching SEO data for example.com…"]
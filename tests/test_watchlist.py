@@ -0,0 +1,68 @@
+import json
+import threading
+
+import watchlist
+from email_queue import DeliveryTicket
+from result_store import get_result_store
+
+
+def _slow_delivery(subject, body, recipient_email):
+    ticket = DeliveryTicket(recipient_email, subject, body)
+
+    def deliver():
+        ticket.status = "sent"
+        ticket._done.set()
+
+    threading.Timer(0.3, deliver).start()
+    return ticket
+
+
+def test_once_waits_for_queued_alerts(monkeypatch, tmp_path, capsys):
+    domain = "watch-drain.example"
+    get_result_store().save({"domain": domain, "visits": 1000, "similar_sites": [], "tags": []})
+    get_result_store().flush()
+    monkeypatch.setattr(watchlist, "analyze_domain",
+                        lambda domain, priority=None: {"domain": domain, "visits": 5000, "similar_sites": [], "tags": []})
+    monkeypatch.setattr(watchlist, "queue_email", _slow_delivery)
+    path = tmp_path / "watchlist.json"
+    path.write_text(json.dumps({"domains": [{"domain": domain, "recipients": ["a@example.com", "b@example.com"]}]}))
+
+    assert watchlist.main(["--once", "-f", str(path)]) == 0
+
+    stats = json.loads(capsys.readouterr().out)["stats"]
+    assert stats["alerts"] == 1
+    assert stats["alerts_sent"] == 2
+    assert get_result_store().latest(domain)["data"]["visits"] == 5000
+
+
+def test_flush_reports_alerts_still_pending(monkeypatch):
+    monitor = watchlist.WatchlistMonitor()
+    monitor._tickets.append(DeliveryTicket("a@example.com", "subject", "body"))
+
+    assert monitor.flush(timeout=0.05) is False
+    assert len(monitor._tickets) == 1
+
+
+def _finished_ticket(status):
+    ticket = DeliveryTicket("a@example.com", "subject", "body")
+    ticket.status = status
+    ticket._done.set()
+    return ticket
+
+
+def test_each_cycle_prunes_finished_alerts(monkeypatch):
+    monitor = watchlist.WatchlistMonitor()
+    pending = DeliveryTicket("b@example.com", "subject", "body")
+    monitor._tickets.extend([_finished_ticket("sent"), pending, _finished_ticket("failed")])
+
+    monitor.run_cycle({"domains": [], "spread_seconds": 0, "visits_threshold": 0.1})
+
+    assert monitor._tickets == [pending]
+    assert monitor.stats["alerts_sent"] == 1
+    assert monitor.stats["alerts_failed"] == 1
+
+    pending.status = "sent"
+    pending._done.set()
+    assert monitor.prune_tickets() == 0
+    assert monitor._tickets == []
+    assert monitor.stats["alerts_sent"] == 2
@@ -0,0 +1,268 @@
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+TRACE_FILE = os.getenv("SEO_TRACE_FILE", "")  # JSONL span export, empty disables it
+HISTOGRAM_SAMPLES = int(os.getenv("SEO_TRACE_SAMPLES", 2048))  # Latest durations kept per stage
+
+# Prometheus-style bucket bounds, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class StageHistogram:
+    """
+    Latency histogram of one stage: cumulative buckets, totals and a
+    window of recent samples for percentiles.
+    """
+
+    def __init__(self, max_samples: int = HISTOGRAM_SAMPLES):
+        self.max_samples = max_samples
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self._samples = []
+
+    def observe(self, seconds: float, error: bool = False):
+        self.count += 1
+        self.total += seconds
+        if error:
+            self.errors += 1
+        index = bisect.bisect_left(BUCKETS, seconds)
+        if index < len(self.buckets):
+            self.buckets[index] += 1
+        self._samples.append(seconds)
+        if len(self._samples) > self.max_samples:
+            del self._samples[0]
+
+    def percentile(self, q: float) -> float:
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "max": max(self._samples) if self._samples else 0.0,
+        }
+
+
+class Tracer:
+    """
+    Records spans per stage into in-process histograms and, optionally,
+    appends every finished span to a JSONL trace file.
+    """
+
+    def __init__(self, trace_file: str = TRACE_FILE):
+        self.trace_file = trace_file
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, stage: str, **attributes):
+        """
+        Times the enclosed block as `stage`. Nested spans record their parent.
+        """
+        stack = self._stack()
+        span_id = uuid.uuid4().hex[:16]
+        parent_id = stack[-1] if stack else None
+        stack.append(span_id)
+        start_wall = time.time()
+        start_time = time.perf_counter()
+        error = None
+        try:
+            yield attributes
+        except BaseException as e:
+            error = repr(e)
+            raise
+        finally:
+            stack.pop()
+            self.record(stage, time.perf_counter() - start_time, error=error, span_id=span_id,
+                        parent_id=parent_id, start=start_wall, attributes=attributes)
+
+    def record(self, stage: str, seconds: float, error=None, span_id=None, parent_id=None,
+               start=None, attributes=None):
+        """
+        Records a finished span measured elsewhere.
+        """
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = StageHistogram()
+            histogram.observe(seconds, error=error is not None)
+        if self.trace_file:
+            self._export({
+                "span_id": span_id or uuid.uuid4().hex[:16],
+                "parent_id": parent_id,
+                "stage": stage,
+                "start": start if start is not None else time.time() - seconds,
+                "duration": seconds,
+                "error": error,
+                "thread": threading.current_thread().name,
+                "attributes": attributes or {},
+            })
+
+    def _export(self, record: dict):
+        try:
+            line = json.dumps(record, default=str)
+            with self._lock:
+                with open(self.trace_file, "a") as file:
+                    file.write(line + "\n")
+        except OSError as e:
+            logging.warning(f"Could not write trace file {self.trace_file}: {e}")
+
+    def summary(self) -> dict:
+        """
+        Returns count, error count, mean and p50/p95/p99 latency per stage.
+        """
+        with self._lock:
+            return {stage: histogram.summary() for stage, histogram in sorted(self._histograms.items())}
+
+    def render_prometheus(self) -> str:
+        """
+        Renders the histograms in the Prometheus text exposition format.
+        """
+        lines = [
+            "# HELP seo_stage_duration_seconds Duration of each processing stage.",
+            "# TYPE seo_stage_duration_seconds histogram",
+        ]
+        quantile_lines = [
+            "# HELP seo_stage_duration_quantile_seconds Recent latency quantiles of each stage.",
+            "# TYPE seo_stage_duration_quantile_seconds gauge",
+        ]
+        error_lines = [
+            "# HELP seo_stage_errors_total Spans of each stage that raised.",
+            "# TYPE seo_stage_errors_total counter",
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.buckets):
+                    cumulative += count
+                    lines.append(f'seo_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'seo_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'seo_stage_duration_seconds_sum{{stage="{stage}"}} {histogram.total}')
+                lines.append(f'seo_stage_duration_seconds_count{{stage="{stage}"}} {histogram.count}')
+                for quantile in (0.5, 0.95, 0.99):
+                    quantile_lines.append(
+                        f'seo_stage_duration_quantile_seconds{{stage="{stage}",quantile="{quantile}"}} '
+                        f'{histogram.percentile(quantile)}'
+                    )
+                error_lines.append(f'seo_stage_errors_total{{stage="{stage}"}} {histogram.errors}')
+        return "\n".join(lines + quantile_lines + error_lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+# Process-wide tracer
+tracer = Tracer()
+span = tracer.span
+
+
+class LLMTraceHandler(BaseCallbackHandler):
+    """
+    Records an "llm_call" span for every LLM request and a "tool_dispatch"
+    span for every tool call made by the agent.
+    """
+
+    def __init__(self):
+        self._starts = {}
+
+    def _start(self, run_id):
+        self._starts[run_id] = (time.time(), time.perf_counter())
+
+    def _end(self, stage, run_id, error=None, **attributes):
+        started = self._starts.pop(run_id, None)
+        if started is not None:
+            tracer.record(stage, time.perf_counter() - started[1], error=error, start=started[0],
+                          attributes=attributes)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end("llm_call", run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end("llm_call", run_id, error=repr(error))
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._starts[run_id] = (time.time(), time.perf_counter(), (serialized or {}).get("name"))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        started = self._starts.get(run_id)
+        self._end("tool_dispatch", run_id, tool=started[2] if started and len(started) > 2 else None)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        started = self._starts.get(run_id)
+        self._end("tool_dispatch", run_id, error=repr(error),
+                  tool=started[2] if started and len(started) > 2 else None)
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] == "/metrics":
+            body = tracer.render_prometheus().encode()
+            content_type = "text/plain; version=0.0.4"
+        elif self.path.split("?")[0] == "/metrics.json":
+            body = json.dumps(tracer.summary()).encode()
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_metrics_server = None
+_metrics_lock = threading.Lock()
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0"):
+    """
+    Serves /metrics (Prometheus text) and /metrics.json from a daemon thread.
+    Safe to call more than once; only the first call starts a server.
+    """
+    global _metrics_server
+    with _metrics_lock:
+        if _metrics_server is not None:
+            return _metrics_server
+        try:
+            _metrics_server = ThreadingHTTPServer((host, port), _MetricsRequestHandler)
+        except OSError as e:
+            logging.warning(f"Metrics server not started on port {port}: {e}")
+            return None
+        threading.Thread(target=_metrics_server.serve_forever, name="metrics-server", daemon=True).start()
+        logging.info(f"Metrics available on http://{host}:{port}/metrics")
+    return _metrics_server
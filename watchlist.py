@@ -0,0 +1,253 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from fetch_seo_data import analyze_domain, normalize_domain
+from manage_email import queue_email
+from rate_limiter import BATCH
+from result_store import get_result_store
+from seo_cache import seo_cache
+
+WATCHLIST_FILE = os.getenv("SEO_WATCHLIST_FILE", "watchlist.json")
+DEFAULT_INTERVAL = 7 * 24 * 3600  # Re-check every domain weekly
+DEFAULT_SPREAD = 3600  # Spread the checks of one cycle over an hour
+DEFAULT_VISITS_THRESHOLD = 0.10  # Relative visits change worth an alert
+DEFAULT_FLUSH_TIMEOUT = 120  # Seconds to wait for queued alerts before exiting
+
+
+def load_watchlist(path: str = WATCHLIST_FILE) -> dict:
+    """
+    Reads the watchlist file:
+
+        {"interval_seconds": 604800, "spread_seconds": 3600, "visits_threshold": 0.1,
+         "domains": [{"domain": "example.com", "recipients": ["me@example.com"]}]}
+    """
+    with open(path, "r") as file:
+        config = json.load(file)
+    config.setdefault("interval_seconds", DEFAULT_INTERVAL)
+    config.setdefault("spread_seconds", DEFAULT_SPREAD)
+    config.setdefault("visits_threshold", DEFAULT_VISITS_THRESHOLD)
+    config["domains"] = [
+        entry if isinstance(entry, dict) else {"domain": entry, "recipients": []}
+        for entry in config.get("domains", [])
+    ]
+    return config
+
+
+def diff_snapshots(old: dict, new: dict, visits_threshold: float = DEFAULT_VISITS_THRESHOLD) -> dict:
+    """
+    Compares two SEO records and returns only the meaningful changes:
+    visits moving by at least `visits_threshold`, similar sites and tags
+    added or removed, and a new category. An empty dict means no change.
+    """
+    changes = {}
+    old_visits, new_visits = old.get("visits") or 0, new.get("visits") or 0
+    if old_visits != new_visits:
+        relative = (new_visits - old_visits) / old_visits if old_visits else 1.0
+        if abs(relative) >= visits_threshold:
+            changes["visits"] = {"old": old_visits, "new": new_visits, "change": round(relative, 4)}
+
+    old_sites = {site["domain"] for site in old.get("similar_sites", [])}
+    new_sites = {site["domain"] for site in new.get("similar_sites", [])}
+    if new_sites - old_sites:
+        changes["new_similar_sites"] = sorted(new_sites - old_sites)
+    if old_sites - new_sites:
+        changes["removed_similar_sites"] = sorted(old_sites - new_sites)
+
+    old_tags, new_tags = set(old.get("tags", [])), set(new.get("tags", []))
+    if new_tags - old_tags:
+        changes["added_tags"] = sorted(new_tags - old_tags)
+    if old_tags - new_tags:
+        changes["removed_tags"] = sorted(old_tags - new_tags)
+
+    if old.get("category") != new.get("category"):
+        changes["category"] = {"old": old.get("category"), "new": new.get("category")}
+    return changes
+
+
+def generate_change_email_content(domain: str, changes: dict):
+    """
+    Generates the subject and body of a change alert.
+    """
+    subject = f"SEO changes detected for {domain}"
+    lines = [f"The scheduled check of {domain} found the following changes:", ""]
+    if "visits" in changes:
+        visits = changes["visits"]
+        lines.append(f"Visits: {visits['old']} -> {visits['new']} ({visits['change']:+.1%})")
+    if "category" in changes:
+        lines.append(f"Category: {changes['category']['old']} -> {changes['category']['new']}")
+    for key, label in (("new_similar_sites", "New similar sites"), ("removed_similar_sites", "Removed similar sites"),
+                       ("added_tags", "Added key words"), ("removed_tags", "Removed key words")):
+        if key in changes:
+            lines.append(f"{label}: {', '.join(changes[key])}")
+    lines.append("\nMessage from Agent_SEO")
+    return subject, "\n".join(lines)
+
+
+class WatchlistMonitor:
+    """
+    Background scheduler that re-fetches every watched domain once per
+    interval, compares it to its previous snapshot and emails the
+    recipients only when something meaningful changed.
+    """
+
+    def __init__(self, path: str = WATCHLIST_FILE, alert=None):
+        self.path = path
+        self.alert = alert or self._send_alert
+        self.stats = {"cycles": 0, "checks": 0, "changed": 0, "alerts": 0, "errors": 0,
+                      "alerts_sent": 0, "alerts_failed": 0}
+        self._stop = threading.Event()
+        self._thread = None
+        self._tickets = []  # Delivery tickets of alerts not yet known to be sent or failed
+        self._tickets_lock = threading.Lock()
+
+    def _send_alert(self, domain, changes, recipients):
+        subject, body = generate_change_email_content(domain, changes)
+        return [queue_email(subject, body, recipient) for recipient in recipients]
+
+    def check_domain(self, entry: dict, visits_threshold: float = DEFAULT_VISITS_THRESHOLD) -> dict:
+        """
+        Fetches one domain, stores the snapshot and returns the changes since the previous one.
+        """
+        domain = normalize_domain(entry["domain"])
+        seo_cache.invalidate(domain)  # A scheduled check must see fresh data
+        seo_data = analyze_domain(domain, priority=BATCH)
+        store = get_result_store()
+        previous = store.latest(seo_data.get("domain", domain))
+        store.save(seo_data)
+        self.stats["checks"] += 1
+
+        changes = diff_snapshots(previous["data"], seo_data, visits_threshold) if previous else {}
+        if changes:
+            self.stats["changed"] += 1
+            if entry.get("recipients"):
+                tickets = self.alert(domain, changes, entry["recipients"]) or []
+                with self._tickets_lock:
+                    self._tickets.extend(tickets)
+                self.stats["alerts"] += 1
+            logging.info(f"Watchlist: {domain} changed: {changes}")
+        return changes
+
+    def run_cycle(self, config: dict = None) -> dict:
+        """
+        Checks every domain once, spacing the requests over the spread window.
+        Returns the changes found per domain.
+        """
+        config = config or load_watchlist(self.path)
+        entries = config["domains"]
+        spacing = config["spread_seconds"] / len(entries) if entries else 0
+        results = {}
+        for index, entry in enumerate(entries):
+            if self._stop.is_set():
+                break
+            try:
+                results[entry["domain"]] = self.check_domain(entry, config["visits_threshold"])
+            except Exception as e:
+                self.stats["errors"] += 1
+                logging.error(f"Watchlist check failed for {entry['domain']}: {e}")
+            if index < len(entries) - 1:
+                self._stop.wait(spacing)
+        self.stats["cycles"] += 1
+        self.prune_tickets()  # Keeps the daemon from accumulating tickets between flushes
+        return results
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.time()
+            interval = DEFAULT_INTERVAL
+            try:
+                config = load_watchlist(self.path)
+                interval = config["interval_seconds"]
+                self.run_cycle(config)
+            except (OSError, ValueError) as e:
+                logging.error(f"Could not load watchlist {self.path}: {e}")
+            self._stop.wait(max(interval - (time.time() - started), 0))
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="watchlist-monitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = None):
+        """
+        Stops the scheduler; with `timeout`, also waits for the running cycle to finish.
+        """
+        self._stop.set()
+        if timeout is not None and self._thread is not None:
+            self._thread.join(timeout)
+
+    def _settle(self, deadline: float) -> list:
+        """
+        Waits for the alert tickets until `deadline`, counts the finished ones
+        and forgets them. Returns the tickets still pending, which are kept.
+        """
+        with self._tickets_lock:
+            tickets, self._tickets = self._tickets, []
+        pending = []
+        for ticket in tickets:
+            if not ticket.wait(max(deadline - time.time(), 0)):
+                pending.append(ticket)
+            elif ticket.status == "sent":
+                self.stats["alerts_sent"] += 1
+            else:
+                self.stats["alerts_failed"] += 1
+        if pending:
+            with self._tickets_lock:
+                self._tickets[:0] = pending
+        return pending
+
+    def prune_tickets(self) -> int:
+        """
+        Counts and drops the alerts delivered or failed so far without
+        waiting for the others. Returns how many are still pending.
+        """
+        return len(self._settle(time.time()))
+
+    def flush(self, timeout: float = DEFAULT_FLUSH_TIMEOUT) -> bool:
+        """
+        Waits until the queued alerts are sent or have failed and the
+        snapshots are written, so the process can exit without losing them.
+        Returns False if some alerts were still pending after `timeout`.
+        """
+        pending = self._settle(time.time() + timeout)
+        if pending:
+            logging.warning(f"Watchlist: {len(pending)} alerts still queued after {timeout}s")
+        get_result_store().flush()
+        return not pending
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monitor a watchlist of domains and email only when they change.")
+    parser.add_argument("-f", "--file", default=WATCHLIST_FILE, help="Watchlist JSON file")
+    parser.add_argument("--once", action="store_true", help="Run a single cycle without spacing and exit")
+    parser.add_argument("--flush-timeout", type=float, default=DEFAULT_FLUSH_TIMEOUT,
+                        help="Seconds to wait for queued alerts before exiting")
+    args = parser.parse_args(argv)
+
+    monitor = WatchlistMonitor(args.file)
+    if args.once:
+        config = load_watchlist(args.file)
+        config["spread_seconds"] = 0
+        results = monitor.run_cycle(config)
+        # Alerts are delivered by a daemon thread that dies with the process
+        delivered = monitor.flush(args.flush_timeout)
+        print(json.dumps({"changes": results, "stats": monitor.stats}, indent=2))
+        return 0 if delivered else 1
+    monitor.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        monitor.stop(timeout=args.flush_timeout)
+        monitor.flush(args.flush_timeout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())